@@ -0,0 +1,178 @@
+"""
+Асинхронные версии эндпоинтов чтения для запуска под ASGI
+(``ASYNC_READ_VIEWS``). Они используют сериализаторы и пагинацию DRF, но
+обходят синхронный стек view: аутентификация читает claims токена, а к базе
+обращается только асинхронный ORM.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from users.authentication import PrincipalJWTAuthentication
+from users.principal import get_principal
+from organizations.models import Course
+from organizations.serializers import CourseSerializer
+from events.models import Event
+from events.serializers import EventSerializer
+from exams.models import Exam, Result
+from exams.serializers import ExamSerializer, ResultSerializer
+from exams.cache import exam_payload_cache
+from .eager_loading import plan_queryset
+from .pagination import CoursePagination, EventPagination, ResultPagination
+from .renderers import FastJSONRenderer
+from .conditional import aconditional_get
+from .search import EventSearch, CourseSearch
+from .row_serializers import compile_serializer
+from .streaming import STREAM_QUERY_PARAM
+from .views import COURSE_VALIDATOR_FIELDS
+
+authenticator = PrincipalJWTAuthentication()
+renderer = FastJSONRenderer()
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(renderer.render(data), content_type=renderer.media_type,
+                        status=status, headers=headers)
+
+
+def error_response(request, exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers = {'WWW-Authenticate': authenticator.authenticate_header(request)}
+        exc.status_code = 401
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def not_found(model):
+    # То же сообщение, что у get_object_or_404 в синхронных представлениях
+    return Http404(f'No {model._meta.object_name} matches the given query.')
+
+
+def async_read_view(authenticated=True):
+    """
+    Обертка для ``async def view(request, ...)``, принимающей ``Request`` DRF:
+    JWT-аутентификация и ответы об ошибках в формате DRF.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(http_request, *args, **kwargs):
+            request = Request(http_request)
+            try:
+                result = await authenticator.aauthenticate(request)
+                if result is not None:
+                    request.user, request.auth = result
+                elif authenticated:
+                    raise exceptions.NotAuthenticated()
+                return await view(request, *args, **kwargs)
+            except Http404 as exc:
+                return error_response(request, exceptions.NotFound(*exc.args))
+            except exceptions.APIException as exc:
+                return error_response(request, exc)
+        return wrapper
+    return decorator
+
+
+def read_view(async_view, sync_view):
+    """
+    Один URL, две реализации: GET обрабатывает ``async_view``, запись и
+    потоковая выгрузка идут в обычный view DRF в рабочем потоке.
+    """
+    threaded_view = sync_to_async(sync_view)
+
+    # Атрибуты DRF-представления (cls, actions, csrf_exempt) нужны схеме drf-yasg
+    @wraps(sync_view)
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET' and STREAM_QUERY_PARAM not in request.GET:
+            return await async_view(request, *args, **kwargs)
+        return await threaded_view(request, *args, **kwargs)
+
+    return view
+
+
+async def list_response(request, queryset, serializer_class, paginator, search=None):
+    unfiltered = queryset
+    if search is not None:
+        queryset = search.filter(queryset)
+    row_serializer = compile_serializer(serializer_class)
+    if row_serializer is not None:
+        queryset = row_serializer.values(queryset, [name for name, _ in paginator.get_fields()])
+        serialize = row_serializer.serialize
+    else:
+        serialize = lambda rows: serializer_class(rows, many=True).data
+    page = await paginator.apaginate_queryset(queryset, request)
+    if page is not None:
+        data = {'next': paginator.get_next_link(), 'results': serialize(page)}
+    else:
+        data = serialize([row async for row in queryset])
+    if search is not None and search.wants_facets:
+        data = search.with_facets(data, await search.afacets(unfiltered))
+    return json_response(data)
+
+
+@async_read_view(authenticated=False)
+async def event_list(request):
+    queryset = Event.objects.all().order_by('date')
+    search = EventSearch(request)
+    return await aconditional_get(request, search.base(queryset), lambda: list_response(
+        request, queryset, EventSerializer, EventPagination(), search))
+
+
+@async_read_view()
+async def course_list(request):
+    principal = get_principal(request)
+    if principal.is_organization:
+        # Для организаций показываем только их курсы
+        organization_id = await principal.aget_organization_id()
+        if organization_id:
+            courses = Course.objects.filter(organization_id=organization_id)
+        else:
+            courses = Course.objects.none()
+    else:
+        courses = Course.objects.all()
+    search = CourseSearch(request)
+    return await aconditional_get(request, search.base(courses), lambda: list_response(
+        request, plan_queryset(courses, CourseSerializer), CourseSerializer, CoursePagination(), search),
+        COURSE_VALIDATOR_FIELDS)
+
+
+@async_read_view()
+async def exam_detail(request, pk):
+    principal = get_principal(request)
+    organization_id = await principal.aget_organization_id() if principal.is_organization else None
+    exams = Exam.objects.filter(pk=pk)
+    if principal.is_organization:
+        exams = exams.filter(author_id=organization_id)
+    return await aconditional_get(request, exams, lambda: exam_payload(principal, organization_id, exams, pk),
+                                  single=True)
+
+
+async def exam_payload(principal, organization_id, exams, pk):
+    versions = await sync_to_async(exam_payload_cache.get_versions)([pk])
+    payload = (await sync_to_async(exam_payload_cache.get_many)(versions)).get(pk)
+    if payload is None:
+        exam = await plan_queryset(exams, ExamSerializer).afirst()
+        if exam is None:
+            raise not_found(Exam)
+        payload = ExamSerializer(exam).data
+        await sync_to_async(exam_payload_cache.set_many)({pk: payload}, versions)
+    elif principal.is_organization and payload['author'] != organization_id:
+        # Организациям доступны только собственные экзамены
+        raise Http404
+    return json_response(payload)
+
+
+@async_read_view()
+async def result_list(request):
+    results = Result.objects.filter(user_id=request.user.pk).order_by('-completed_at')
+    results = plan_queryset(results, ResultSerializer)
+    return await list_response(request, results, ResultSerializer, ResultPagination())
+
+
+@async_read_view()
+async def result_detail(request, pk):
+    result = await Result.objects.filter(user_id=request.user.pk, pk=pk).afirst()
+    if result is None:
+        raise not_found(Result)
+    return json_response(ResultSerializer(result).data)
@@ -0,0 +1,114 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+VALIDATOR_FIELDS = ('updated_at',)
+
+
+def _aggregates(fields):
+    return {'count': Count('pk'), **{f'max_{index}': Max(field) for index, field in enumerate(fields)}}
+
+
+def _validators(values, fields, single):
+    if single and not values['count']:
+        # Несуществующему объекту нечего сравнивать (If-None-Match: *)
+        return None
+    stamps = [values[f'max_{index}'] for index in range(len(fields))]
+    etag = '-'.join([str(values['count'])] +
+                    [str(int(stamp.timestamp() * 1_000_000)) if stamp else '0' for stamp in stamps])
+    if not single:
+        # Удаление строки не сдвигает max(updated_at): по одному If-Modified-Since
+        # список ответил бы ложным 304. ETag учитывает число строк
+        return etag, None
+    present = [stamp for stamp in stamps if stamp is not None]
+    return etag, max(present) if present else None
+
+
+def get_validators(queryset, fields=VALIDATOR_FIELDS, single=False):
+    """
+    ETag и Last-Modified выборки из одного агрегирующего запроса: число строк
+    и самая поздняя метка каждого поля ``fields``. Last-Modified есть только
+    у ``single`` - объекта, отфильтрованного по pk; ``None``, если его нет.
+    """
+    return _validators(queryset.order_by().aggregate(**_aggregates(fields)), fields, single)
+
+
+async def aget_validators(queryset, fields=VALIDATOR_FIELDS, single=False):
+    return _validators(await queryset.order_by().aaggregate(**_aggregates(fields)), fields, single)
+
+
+def not_modified_response(request, validators):
+    """
+    304 (или 412), если валидаторы запроса еще совпадают; ``None``, если view
+    должен построить ответ.
+    """
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    response = get_conditional_response(
+        request, etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(request, response, validators)
+    return response
+
+
+def set_validators(request, response, validators):
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = validators
+    response.headers['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    # Браузер не должен отдавать список из кеша без перепроверки
+    patch_cache_control(response, no_cache=True)
+    if 'HTTP_AUTHORIZATION' in request.META:
+        patch_cache_control(response, private=True)
+        patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional_get(request, queryset, respond, fields=VALIDATOR_FIELDS, single=False):
+    """
+    Вызывает ``respond()``, только если копия ``queryset`` у клиента устарела;
+    ответ в любом случае несет ETag (карточка - и Last-Modified).
+    """
+    validators = get_validators(queryset, fields, single)
+    response = not_modified_response(request, validators)
+    if response is None:
+        response = set_validators(request, respond(), validators)
+    return response
+
+
+async def aconditional_get(request, queryset, respond, fields=VALIDATOR_FIELDS, single=False):
+    """``conditional_get`` для асинхронных view: ``respond()`` возвращает awaitable."""
+    validators = await aget_validators(queryset, fields, single)
+    response = not_modified_response(request, validators)
+    if response is None:
+        response = set_validators(request, await respond(), validators)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Примесь generic view: список и карточка отвечают 304 по валидаторам
+    отфильтрованной выборки до сериализации.
+    """
+
+    validator_fields = VALIDATOR_FIELDS
+
+    def get_validator_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_validator_queryset()
+        return conditional_get(request, queryset, lambda: super(ConditionalGetMixin, self).list(
+            request, *args, **kwargs), self.validator_fields)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return conditional_get(request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(
+            request, *args, **kwargs), self.validator_fields, single=True)
@@ -0,0 +1,52 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _nested_serializer(serializer_class, field_name):
+    field = serializer_class._declared_fields.get(field_name)
+    if isinstance(field, serializers.ListSerializer):
+        return field.child.__class__, field.source or field_name
+    if isinstance(field, serializers.BaseSerializer):
+        return field.__class__, field.source or field_name
+    return None, field_name
+
+
+def plan_queryset(queryset, serializer_class):
+    """
+    Загружает связи, которые читает сериализатор.
+
+    Сериализаторы перечисляют их в ``Meta.select_related`` и
+    ``Meta.prefetch_related``. Для связей, которые выводит вложенный
+    сериализатор, строится ``Prefetch`` по объявлениям этого сериализатора,
+    так что дерево целиком загружается фиксированным числом запросов.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    if meta is None:
+        return queryset
+    select_related = getattr(meta, 'select_related', ())
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    lookups = []
+    for field_name in getattr(meta, 'prefetch_related', ()):
+        nested_class, source = _nested_serializer(serializer_class, field_name)
+        if nested_class is None:
+            lookups.append(source)
+            continue
+        related_model = queryset.model._meta.get_field(source).related_model
+        lookups.append(Prefetch(
+            source,
+            queryset=plan_queryset(related_model._default_manager.all(), nested_class),
+        ))
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset
+
+
+class EagerLoadingMixin:
+    """
+    Примесь generic view: выборка планируется по сериализатору view.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return plan_queryset(queryset, self.get_serializer_class())
@@ -0,0 +1,97 @@
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from events.models import Event
+from events.serializers import EventSerializer
+from organizations.models import Organization, Course
+from organizations.serializers import CourseSerializer
+from api.renderers import FastJSONRenderer
+from api.row_serializers import compile_serializer
+from api.eager_loading import plan_queryset
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает сериализацию списков через ModelSerializer и JSONRenderer '
+            'с компилированными сериализаторами и orjson на тестовых данных')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Число строк в списке')
+        parser.add_argument('--repeat', type=int, default=5, help='Число повторов, берется лучший')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                for serializer_class, queryset in (
+                    (EventSerializer, Event.objects.order_by('date')),
+                    (CourseSerializer, Course.objects.all()),
+                ):
+                    self.compare(serializer_class, queryset, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def compare(self, serializer_class, queryset, repeat):
+        row_serializer = compile_serializer(serializer_class)
+        json_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        def drf():
+            data = serializer_class(plan_queryset(queryset, serializer_class), many=True).data
+            return json_renderer.render(data)
+
+        def drf_no_sql(instances):
+            return lambda: json_renderer.render(serializer_class(instances, many=True).data)
+
+        def compiled():
+            return fast_renderer.render(row_serializer.serialize(row_serializer.values(queryset)))
+
+        def compiled_no_sql(rows):
+            return lambda: fast_renderer.render(row_serializer.serialize(rows))
+
+        drf_time, drf_body = best_of(repeat, drf)
+        compiled_time, compiled_body = best_of(repeat, compiled)
+        drf_cpu, _ = best_of(repeat, drf_no_sql(list(plan_queryset(queryset, serializer_class))))
+        compiled_cpu, _ = best_of(repeat, compiled_no_sql(list(row_serializer.values(queryset))))
+        name = serializer_class.__name__
+        if drf_body != compiled_body:
+            self.stdout.write(self.style.ERROR(f'{name}: ответы различаются'))
+        self.stdout.write(
+            f'{name}: с запросом {drf_time * 1000:.1f} -> {compiled_time * 1000:.1f} мс '
+            f'(x{drf_time / compiled_time:.1f}), без запроса {drf_cpu * 1000:.1f} -> '
+            f'{compiled_cpu * 1000:.1f} мс (x{drf_cpu / compiled_cpu:.1f}), {len(drf_body)} байт'
+        )
+
+    def seed(self, rows):
+        now = timezone.now()
+        owner = User.objects.create(email='benchmark@example.com', password='!', role='organization')
+        organization = Organization.objects.create(owner=owner, name='Организация', addres={})
+        Course.objects.bulk_create(
+            Course(organization=organization, name=f'Курс {n}', description='Описание курса',
+                   level=n % 6 + 1, photo=f'courses/{n}.png' if n % 2 else '')
+            for n in range(rows)
+        )
+        Event.objects.bulk_create(
+            Event(external_id=f'benchmark-{n}', title=f'Событие {n}', description='Описание',
+                  event_type='concert', venue='Театр', price='от 500 ₽',
+                  source_url=f'https://afisha.yandex.ru/{n}', date=now + timedelta(hours=n))
+            for n in range(rows)
+        )
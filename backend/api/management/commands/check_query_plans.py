@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from api.query_plans import hot_queries, seed_plan_data, scans_sequentially, analyze
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Заполняет БД тестовыми данными внутри транзакции и печатает, какие горячие '
+            'запросы используют последовательное сканирование. Те же проверки - в api.tests')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help='Множитель объема данных')
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы запросов')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Проверка планов запросов работает только с PostgreSQL')
+        failures = []
+        try:
+            with transaction.atomic():
+                user, organization, exam, question = seed_plan_data(options['scale'])
+                analyze()
+                for name, queryset, table in hot_queries(user, organization, exam, question):
+                    if options['verbose_plans']:
+                        self.stdout.write(queryset.explain())
+                    if scans_sequentially(queryset, table):
+                        failures.append(name)
+                        self.stdout.write(self.style.ERROR(f'SEQ SCAN  {name} ({table})'))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'ok        {name}'))
+                raise Rollback
+        except Rollback:
+            pass
+        if failures:
+            raise CommandError(f'Последовательное сканирование в запросах: {", ".join(failures)}')
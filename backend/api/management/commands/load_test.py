@@ -0,0 +1,66 @@
+import asyncio
+import statistics
+import time
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ['/api/v1/events/', '/api/v1/course/', '/api/v1/result/']
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def worker(client, paths, deadline, latencies, errors):
+    n = 0
+    while time.perf_counter() < deadline:
+        path = paths[n % len(paths)]
+        n += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+        except httpx.HTTPError:
+            errors.append(path)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors.append(path)
+
+
+async def run_load(base_url, paths, concurrency, duration, token):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies, errors = [], []
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        # Прогрев: соединения, кеши и ленивые импорты не должны попасть в замер
+        await asyncio.gather(*(client.get(path) for path in paths))
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, paths, deadline, latencies, errors)
+                               for _ in range(concurrency)))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест читающих эндпоинтов запущенного сервера: '
+            'N параллельных клиентов, RPS и перцентили задержки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='Адрес сервера, например http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths', help='Путь запроса (можно несколько)')
+        parser.add_argument('--concurrency', type=int, default=50, help='Число параллельных клиентов')
+        parser.add_argument('--duration', type=float, default=20, help='Длительность замера, секунд')
+        parser.add_argument('--token', help='JWT access-токен для закрытых эндпоинтов')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        latencies, errors = asyncio.run(run_load(
+            options['base_url'], paths, options['concurrency'], options['duration'], options['token']))
+        if not latencies:
+            raise CommandError('Ни один запрос не выполнен')
+        latencies.sort()
+        ms = lambda seconds: f'{seconds * 1000:.1f} мс'
+        self.stdout.write(f'Запросов: {len(latencies)}, ошибок: {len(errors)}')
+        self.stdout.write(f'RPS: {len(latencies) / options["duration"]:.1f}')
+        self.stdout.write(f'p50: {ms(percentile(latencies, 0.5))}, p95: {ms(percentile(latencies, 0.95))}, '
+                          f'p99: {ms(percentile(latencies, 0.99))}, среднее: {ms(statistics.fmean(latencies))}')
@@ -1,3 +1,19 @@
 from django.db import models
 
-# Create your models here.
+
+class Tombstone(models.Model):
+    """
+    Удаленная строка каталога. Хранится, чтобы дельта-синхронизация сообщала
+    об удалении, пока не пройдет ``SYNC_API['TOMBSTONE_DAYS']``.
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} ({self.deleted_at})"
@@ -0,0 +1,162 @@
+import base64
+import json
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (курсору) вдоль ``ordering``, только вперед.
+
+    Курсор хранит значения сортировки последней строки страницы, поэтому
+    следующая страница - диапазон по индексу сортировки, а не OFFSET.
+    Последнее поле сортировки должно быть уникальным. Пагинация включается
+    явно: без ``cursor`` или ``page_size`` список отдается целиком.
+    """
+
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Выборка запрошенной страницы и еще одной строки для проверки следующей
+        страницы; ``None``, если клиент не просил пагинацию.
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.get_order_by())
+        position = self.decode_cursor(params.get(self.cursor_query_param))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_after_filter(position))
+            except (ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_previous_link(self):
+        return None
+
+    def get_fields(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    def get_order_by(self):
+        # Порядок NULL как у btree-индексов Postgres по умолчанию:
+        # в конце при ASC и в начале при DESC
+        return [F(name).desc(nulls_first=True) if descending else F(name).asc(nulls_last=True)
+                for name, descending in self.get_fields()]
+
+    def get_position(self, row):
+        return [getattr(row, name) for name, _ in self.get_fields()]
+
+    def get_after_filter(self, position):
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.get_fields(), position):
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if descending else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            elif descending:
+                after = Q(**{f'{name}__lt': value})
+                same = Q(**{name: value})
+            else:
+                after = Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & after
+            equal &= same
+        return condition
+
+    def encode_cursor(self, position):
+        # isoformat без усечения микросекунд, иначе строки на границе страницы повторятся
+        data = json.dumps(position, default=lambda value: value.isoformat()).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+
+class OrganizationPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class CoursePagination(KeysetPagination):
+    ordering = ('level', 'id')
+
+
+class EventPagination(KeysetPagination):
+    ordering = ('date', 'id')
+
+
+class ExamPagination(KeysetPagination):
+    ordering = ('level', 'id')
+
+
+class ResultPagination(KeysetPagination):
+    ordering = ('-completed_at', '-id')
+
+
+class EnrollmentPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
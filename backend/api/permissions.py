@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from users.principal import get_principal
 
 class IsOrganizationOwner(permissions.BasePermission):
     """
@@ -7,7 +8,7 @@ class IsOrganizationOwner(permissions.BasePermission):
 
     def has_permission(self, request, view):
         # Allow access if the user is authenticated and is an organization owner
-        return request.user.role == 'organization' or request.method in permissions.SAFE_METHODS
+        return get_principal(request).is_organization or request.method in permissions.SAFE_METHODS
     def has_object_permission(self, request, view, obj):
         # Allow access if the user is the owner of the organization
-        return obj.author == request.user.organizations.first() or request.method in permissions.SAFE_METHODS
\ No newline at end of file
+        return obj.author_id == get_principal(request).organization_id or request.method in permissions.SAFE_METHODS
\ No newline at end of file
@@ -0,0 +1,120 @@
+import json
+import random
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from events.models import Event, SEARCH_VECTOR as EVENT_SEARCH_VECTOR
+from exams.grading import AnswerKey
+from exams.models import Exam, Question, Choice, Result, Attempt
+from organizations.models import Organization, Course, SEARCH_VECTOR as COURSE_SEARCH_VECTOR
+from .search import search_filter
+
+User = get_user_model()
+
+
+def hot_queries(user, organization, exam, question):
+    """
+    Запросы проверки ответов и списков с таблицами, которые они должны
+    читать через индекс.
+    """
+    now = timezone.now()
+    return [
+        ('question by exam and number',
+         Question.objects.filter(exam=exam, number=3), 'exams_question'),
+        ('choice by question and text',
+         Choice.objects.filter(question=question, text='Вариант 2'), 'exams_choice'),
+        ('result by user and exam',
+         Result.objects.filter(user=user, exam=exam), 'exams_result'),
+        ('results of user, newest first',
+         Result.objects.filter(user=user).order_by('-completed_at', '-id')[:50], 'exams_result'),
+        ('exam leaderboard',
+         Result.objects.filter(exam=exam).order_by('-score', 'completed_at', 'id')[:10], 'exams_result'),
+        ('attempts of user for exam',
+         Attempt.objects.filter(user=user, exam=exam).order_by('-created_at'), 'exams_attempt'),
+        ('expired events cleanup',
+         Event.objects.filter(date__isnull=False, date__lt=now), 'events_event'),
+        ('events page by date',
+         Event.objects.order_by('date', 'id')[:50], 'events_event'),
+        ('cheap events this week',
+         Event.objects.filter(date__gte=now, date__lt=now + timedelta(days=7), price_min__lte=500)
+         .order_by('date'), 'events_event'),
+        ('event search',
+         search_filter(Event.objects.order_by('date'), EVENT_SEARCH_VECTOR, 'title', 'концерт'), 'events_event'),
+        ('course search',
+         search_filter(Course.objects.all(), COURSE_SEARCH_VECTOR, 'name', 'татарский'), 'organizations_course'),
+        ('courses of organization',
+         Course.objects.filter(organization=organization).order_by('level', 'id'), 'organizations_course'),
+        ('exams of organization by level',
+         Exam.objects.filter(author=organization).order_by('level'), 'exams_exam'),
+        ('answer key of exam',
+         AnswerKey.rows(exam.pk), 'exams_question'),
+        ('choices of answer key',
+         AnswerKey.rows(exam.pk), 'exams_choice'),
+    ]
+
+
+def seq_scans(plan):
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan.get('Relation Name')
+    for child in plan.get('Plans', []):
+        yield from seq_scans(child)
+
+
+def scans_sequentially(queryset, table):
+    """Читает ли план ``queryset`` таблицу ``table`` последовательным сканированием."""
+    plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+    return table in seq_scans(plan)
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def seed_plan_data(scale=1):
+    """
+    Столько строк, чтобы планировщик выбирал индексы. Возвращает
+    пользователя, организацию, экзамен и вопрос для горячих запросов.
+    """
+    rng = random.Random(42)
+    now = timezone.now()
+    users = User.objects.bulk_create(
+        User(email=f'plan-check-{n}@example.com', password='!', role='organization' if n < 50 else 'user')
+        for n in range(200 * scale)
+    )
+    organizations = Organization.objects.bulk_create(
+        Organization(owner=users[n], name=f'plan-check-{n}') for n in range(50)
+    )
+    Course.objects.bulk_create(
+        Course(organization=rng.choice(organizations), name=f'Курс {n}', level=rng.randint(1, 6))
+        for n in range(2000 * scale)
+    )
+    exams = Exam.objects.bulk_create(
+        Exam(title=f'Экзамен {n}', author=rng.choice(organizations), level=rng.randint(1, 6))
+        for n in range(500 * scale)
+    )
+    questions = Question.objects.bulk_create(
+        Question(exam=exam, number=number, text=f'Вопрос {number}')
+        for exam in exams for number in range(1, 11)
+    )
+    Choice.objects.bulk_create(
+        Choice(question=question, text=f'Вариант {n}', is_correct=n == 1)
+        for question in questions for n in range(1, 5)
+    )
+    Result.objects.bulk_create(
+        (Result(user=rng.choice(users), exam=rng.choice(exams), score=rng.randint(0, 100))
+         for _ in range(20000 * scale)),
+        ignore_conflicts=True,
+    )
+    Attempt.objects.bulk_create(
+        Attempt(user=rng.choice(users), exam=rng.choice(exams), score=rng.randint(0, 100))
+        for _ in range(40000 * scale)
+    )
+    Event.objects.bulk_create(
+        Event(external_id=f'plan-check-{n}', title=f'Событие {n}', event_type='concert',
+              source_url='https://afisha.yandex.ru/', date=now + timedelta(hours=rng.randint(-48, 24 * 90)),
+              price_min=rng.choice([None, 0, 300, 500, 1200]))
+        for n in range(5000 * scale)
+    )
+    return users[60], organizations[0], exams[0], questions[0]
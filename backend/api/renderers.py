@@ -0,0 +1,51 @@
+import math
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _same_float(value):
+    # json.dumps записывает float через repr: 1.5e-07 и 1e+16, orjson - 1.5e-7,
+    # 0.00001 и 1e16. Совпадают только значения без экспоненты у repr
+    return math.isfinite(value) and (value == 0 or 1e-4 <= abs(value) < 1e16)
+
+
+def _orjson_safe(data):
+    """Все ли float в ``data`` orjson запишет так же, как ``json.dumps``."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float) and not _same_float(value):
+            return False
+    return True
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer``, выдающий те же байты через orjson.
+
+    Предназначен для списков ``api.row_serializers`` (строки, числа,
+    логические значения и null); прочие типы передаются кодировщику DRF.
+    Форматированный вывод, кодировка не UTF-8 и float, которые orjson
+    записал бы иначе (экспонента, бесконечность), идут обычному рендереру.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+                or not _orjson_safe(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как JSONRenderer: U+2028 и U+2029 экранируются для совместимости с JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
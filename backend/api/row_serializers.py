@@ -0,0 +1,214 @@
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from .renderers import FastJSONRenderer
+from .streaming import wants_stream, streaming_json_response, STREAM_CHUNK_SIZE
+
+# Поля, у которых to_representation возвращает значение колонки без изменений,
+# и типы колонок, для которых это верно
+IDENTITY_FIELDS = (
+    (serializers.CharField, ('CharField', 'TextField', 'URLField', 'EmailField', 'SlugField')),
+    (serializers.IntegerField, ('AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField',
+                                'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField')),
+    (serializers.BooleanField, ('BooleanField',)),
+)
+# Вложенные и вычисляемые поля читают объекты, а не колонки
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.SerializerMethodField,
+    serializers.ManyRelatedField,
+    serializers.HyperlinkedRelatedField,
+    # json.dumps и orjson по-разному записывают float в экспоненциальной форме
+    serializers.FloatField,
+)
+
+
+class RowSerializer:
+    """
+    Быстрый путь чтения для плоского ``ModelSerializer``.
+
+    Читаемые поля сериализатора один раз компилируются в колонки для
+    ``values_list`` и функцию строки в словарь: колонки, представление
+    которых совпадает со значением в базе, копируются как есть, остальные
+    проходят через ``to_representation`` поля DRF. Результат совпадает с
+    ``serializer_class(instances, many=True).data``.
+    """
+
+    def __init__(self, names, lookups, converters, file_fields):
+        self.names = names
+        self.lookups = lookups
+        self.converters = converters
+        self.file_fields = file_fields
+
+    def values(self, queryset, extra=()):
+        """
+        Строки ``values_list`` скомпилированных колонок. Колонки ``extra``
+        (например, сортировка пагинации) добавляются в конец и доступны как атрибуты.
+        """
+        lookups = self.lookups + tuple(name for name in extra if name not in self.lookups)
+        return queryset.prefetch_related(None).values_list(*lookups, named=True)
+
+    def bind(self):
+        """
+        Преобразователи колонок для одного списка: часовой пояс полей даты и
+        времени определяется один раз, а не для каждого значения.
+        """
+        return [(index, name, _converter(field)) for index, name, field in self.converters]
+
+    def to_representation(self, row, request=None, converters=None):
+        data = dict(zip(self.names, row))
+        for index, name, convert in converters if converters is not None else self.bind():
+            value = row[index]
+            if value is not None:
+                data[name] = convert(value)
+        for index, name, model_field in self.file_fields:
+            data[name] = self.file_url(row[index], model_field, request)
+        return data
+
+    def serialize(self, rows, request=None):
+        converters = self.bind()
+        to_representation = self.to_representation
+        return [to_representation(row, request, converters) for row in rows]
+
+    def iter_serialized(self, rows, request=None):
+        converters = self.bind()
+        for row in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            yield self.to_representation(row, request, converters)
+
+    def file_url(self, name, model_field, request):
+        # Как serializers.FileField: абсолютный URL при наличии запроса
+        if not name:
+            return None
+        url = model_field.storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+def _column(model, source_attrs):
+    """
+    Колонка ``values_list`` для source поля и поле модели, на котором она
+    заканчивается; ``None``, если source - не цепочка колонок.
+    """
+    model_field = None
+    for position, attr in enumerate(source_attrs):
+        if model is None:
+            return None
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        if position < len(source_attrs) - 1:
+            # Через NULL-связь DRF пропускает поле, а values_list вернул бы None
+            if not model_field.is_relation or model_field.null:
+                return None
+            model = model_field.related_model
+        else:
+            model = None
+    return '__'.join(source_attrs), model_field
+
+
+def _converter(field):
+    if not isinstance(field, serializers.DateTimeField):
+        return field.to_representation
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def to_representation(value):
+        # DateTimeField.to_representation для aware-значений из БД
+        if value.utcoffset() is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return to_representation
+
+
+def _is_identity(field, model_field):
+    if isinstance(field, (serializers.ChoiceField, serializers.ReadOnlyField)):
+        return True
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field is None
+    internal_type = model_field.get_internal_type()
+    return any(isinstance(field, field_class) and internal_type in internal_types
+               for field_class, internal_types in IDENTITY_FIELDS)
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    """
+    ``RowSerializer`` для ``serializer_class`` или ``None``, если у него есть
+    вложенные, вычисляемые или собственным образом выводимые поля.
+    """
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer_class.Meta.model
+    names, lookups, converters, file_fields = [], [], [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, UNSUPPORTED_FIELDS) or field.source == '*':
+            return None
+        column = _column(model, field.source_attrs)
+        if column is None:
+            return None
+        lookup, model_field = column
+        if model_field.is_relation != isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Связь отдается только как первичный ключ
+            return None
+        index = len(lookups)
+        names.append(name)
+        lookups.append(lookup)
+        if isinstance(field, serializers.FileField):
+            if not getattr(field, 'use_url', True) or not hasattr(model_field, 'storage'):
+                return None
+            file_fields.append((index, name, model_field))
+        elif isinstance(field, serializers.JSONField):
+            if field.binary:
+                return None
+        elif not _is_identity(field, model_field):
+            converters.append((index, name, field))
+    return RowSerializer(tuple(names), tuple(lookups), tuple(converters), tuple(file_fields))
+
+
+def row_list_response(request, queryset, serializer_class, paginator=None, view=None, context=None):
+    """
+    Ответ-список через скомпилированный сериализатор, с ``?stream=1`` и
+    пагинацией по ключу; ``None``, если ``serializer_class`` не компилируется.
+    ``context`` - контекст сериализатора, который получил бы обычный путь.
+    """
+    row_serializer = compile_serializer(serializer_class)
+    if row_serializer is None:
+        return None
+    serializer_request = (context or {}).get('request')
+    extra = [name for name, _ in paginator.get_fields()] if paginator is not None else ()
+    rows = row_serializer.values(queryset, extra)
+    if wants_stream(request):
+        return streaming_json_response(row_serializer.iter_serialized(rows, serializer_request))
+    if paginator is not None:
+        page = paginator.paginate_queryset(rows, request, view=view)
+        if page is not None:
+            return paginator.get_paginated_response(row_serializer.serialize(page, serializer_request))
+    return Response(row_serializer.serialize(rows, serializer_request))
+
+
+class RowListMixin:
+    """
+    Примесь списка: плоские сериализаторы отдаются через ``compile_serializer``
+    и orjson, view с вложенными сериализаторами сохраняют обычный ``list``.
+    """
+
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        response = row_list_response(request, queryset, self.get_serializer_class(), self.paginator,
+                                     view=self, context=self.get_serializer_context())
+        if response is None:
+            return super().list(request, *args, **kwargs)
+        return response
@@ -0,0 +1,215 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, time, timedelta
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from events.models import Event, SEARCH_VECTOR as EVENT_SEARCH_VECTOR
+from organizations.models import Course, SEARCH_VECTOR as COURSE_SEARCH_VECTOR
+
+
+def search_query(text):
+    """Запрос к русской и простой половинам ``SEARCH_VECTOR``."""
+    return (SearchQuery(text, config='russian', search_type='websearch')
+            | SearchQuery(text, config='simple', search_type='websearch'))
+
+
+def search_filter(queryset, search_vector, trigram_field, text):
+    """
+    Строки ``queryset``, у которых ``search_vector`` совпадает с ``text`` или
+    в ``trigram_field`` есть похожее слово; для каждой половины есть индекс.
+    """
+    return queryset.alias(search=search_vector).filter(
+        Q(search=search_query(text)) | Q(**{f'{trigram_field}__trigram_word_similar': text}))
+
+
+class SearchParamsSerializer(serializers.Serializer):
+    q = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    facets = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_to': 'Дата окончания раньше даты начала'})
+        return attrs
+
+
+class EventSearchParamsSerializer(SearchParamsSerializer):
+    event_type = serializers.ChoiceField(choices=Event.EVENT_TYPES, required=False)
+    min_price = serializers.IntegerField(required=False, min_value=0)
+    max_price = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs.get('min_price') is not None and attrs.get('max_price') is not None \
+                and attrs['min_price'] > attrs['max_price']:
+            raise serializers.ValidationError({'max_price': 'Максимальная цена меньше минимальной'})
+        return attrs
+
+
+class CourseSearchParamsSerializer(SearchParamsSerializer):
+    level = serializers.ListField(child=serializers.ChoiceField(choices=Course.LEVEL_CHOICES), required=False)
+
+
+class CatalogueSearch(ABC):
+    """
+    Поиск по списку каталога из параметров запроса.
+
+    ``q`` ищется по индексированному ``search_vector`` (русские основы и
+    точные словоформы) или, для опечаток и начал слов, по ``trigram_field`` с
+    триграммным индексом; остальные параметры - структурные фильтры. С
+    ``?facets=1`` ответ также содержит число строк для каждого значения
+    ``facet_field`` при всех остальных фильтрах. Оно считается одним
+    агрегирующим запросом рядом с запросом списка: список отфильтрован по
+    фасету, счетчики - нет, а список может быть разбит на страницы или
+    скомпилирован.
+    """
+
+    params_serializer = None
+    search_vector = None
+    trigram_field = None
+    facet_field = None
+    facet_choices = ()
+
+    def __init__(self, request):
+        params = request.query_params
+        data = {name: params.get(name) for name in self.params_serializer().fields if name in params}
+        if self.facet_field in params:
+            data[self.facet_field] = self.facet_values(params)
+        serializer = self.params_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        self.params = serializer.validated_data
+
+    @property
+    def wants_facets(self):
+        return self.params['facets']
+
+    def facet_values(self, params):
+        return params.get(self.facet_field)
+
+    def filter(self, queryset):
+        return self.filter_facet(self.base(queryset))
+
+    def base(self, queryset):
+        """``queryset``, отфильтрованный по всему, кроме фасета."""
+        text = self.params.get('q', '').strip()
+        if text:
+            queryset = search_filter(queryset, self.search_vector, self.trigram_field, text)
+        return self.filter_fields(queryset, self.params)
+
+    @abstractmethod
+    def filter_fields(self, queryset, params):
+        """``queryset``, отфильтрованный по структурным параметрам, кроме фасета."""
+
+    @abstractmethod
+    def filter_facet(self, queryset):
+        """``queryset``, отфильтрованный по выбранным значениям фасета."""
+
+    def facet_aggregates(self):
+        return {f'facet_{index}': Count('pk', filter=Q(**{self.facet_field: value}))
+                for index, (value, _) in enumerate(self.facet_choices)}
+
+    def facet_counts(self, values):
+        return {self.facet_field: {str(value): values[f'facet_{index}']
+                                   for index, (value, _) in enumerate(self.facet_choices)}}
+
+    def facets(self, queryset):
+        return self.facet_counts(self.base(queryset).order_by().aggregate(**self.facet_aggregates()))
+
+    async def afacets(self, queryset):
+        return self.facet_counts(await self.base(queryset).order_by().aaggregate(**self.facet_aggregates()))
+
+    def with_facets(self, data, facets):
+        if isinstance(data, dict):
+            return {**data, 'facets': facets}
+        # Список без пагинации остается массивом, пока фасеты не запрошены
+        return {'results': data, 'facets': facets}
+
+    def add_facets(self, response, queryset):
+        # 304, ошибки и ?stream=1 отдаются без фасетов
+        if self.wants_facets and isinstance(response, Response) and response.status_code == 200:
+            response.data = self.with_facets(response.data, self.facets(queryset))
+        return response
+
+
+class EventSearch(CatalogueSearch):
+    params_serializer = EventSearchParamsSerializer
+    search_vector = EVENT_SEARCH_VECTOR
+    trigram_field = 'title'
+    facet_field = 'event_type'
+    facet_choices = Event.EVENT_TYPES
+
+    def filter_fields(self, queryset, params):
+        # Границы дня берутся в часовом поясе проекта
+        if params.get('date_from'):
+            queryset = queryset.filter(
+                date__gte=timezone.make_aware(datetime.combine(params['date_from'], time.min)))
+        if params.get('date_to'):
+            queryset = queryset.filter(
+                date__lt=timezone.make_aware(datetime.combine(params['date_to'] + timedelta(days=1), time.min)))
+        # Есть билет в диапазоне цен; "от N ₽" не ограничено сверху, "до N ₽" - снизу
+        if params.get('max_price') is not None:
+            queryset = queryset.filter(Q(price_min__lte=params['max_price'])
+                                       | Q(price_min__isnull=True, price_max__lte=params['max_price']))
+        if params.get('min_price') is not None:
+            queryset = queryset.filter(Q(price_max__gte=params['min_price'])
+                                       | Q(price_max__isnull=True, price_min__isnull=False))
+        return queryset
+
+    def filter_facet(self, queryset):
+        if self.params.get('event_type'):
+            queryset = queryset.filter(event_type=self.params['event_type'])
+        return queryset
+
+
+class CourseSearch(CatalogueSearch):
+    params_serializer = CourseSearchParamsSerializer
+    search_vector = COURSE_SEARCH_VECTOR
+    trigram_field = 'name'
+    facet_field = 'level'
+    facet_choices = Course.LEVEL_CHOICES
+
+    def facet_values(self, params):
+        # ?level=1&level=2 и ?level=1,2
+        return [value for item in params.getlist('level') for value in item.split(',') if value]
+
+    def filter_fields(self, queryset, params):
+        # Курс подходит, если его даты пересекаются с периодом; без дат - бессрочный
+        if params.get('date_from'):
+            queryset = queryset.filter(Q(end_date__gte=params['date_from']) | Q(end_date__isnull=True))
+        if params.get('date_to'):
+            queryset = queryset.filter(Q(start_date__lte=params['date_to']) | Q(start_date__isnull=True))
+        return queryset
+
+    def filter_facet(self, queryset):
+        if self.params.get('level'):
+            queryset = queryset.filter(level__in=self.params['level'])
+        return queryset
+
+
+class SearchListMixin:
+    """
+    Примесь списка: фильтрует по ``search_class`` и добавляет фасеты.
+    Ставится перед ``ConditionalGetMixin``: валидаторы покрывают и фасеты.
+    """
+
+    search_class = None
+
+    def get_search(self):
+        if not hasattr(self, '_search'):
+            self._search = self.search_class(self.request)
+        return self._search
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = self.get_search().filter(queryset)
+        return queryset
+
+    def get_validator_queryset(self):
+        return self.get_search().base(super().filter_queryset(self.get_queryset()))
+
+    def list(self, request, *args, **kwargs):
+        return self.get_search().add_facets(super().list(request, *args, **kwargs), self.get_queryset())
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from events.models import Event
+from organizations.models import Course
+from .sync import write_tombstone
+
+
+# Каскад (владелец -> организация -> курсы) и админка удаляют строки
+# каталогов в обход delete_with_tombstones
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Event)
+def tombstone_deleted_row(sender, instance, **kwargs):
+    write_tombstone(instance)
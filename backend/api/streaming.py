@@ -0,0 +1,53 @@
+from itertools import islice
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_QUERY_PARAM = 'stream'
+STREAM_CHUNK_SIZE = 500
+
+
+def wants_stream(request):
+    return request.query_params.get(STREAM_QUERY_PARAM) in ('1', 'true')
+
+
+def iter_serialized(queryset, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Сериализует выборку частями из серверного курсора. ``serialize``
+    принимает список объектов и возвращает сериализованные строки.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from serialize(chunk)
+
+
+def stream_json_array(rows):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    yield '['
+    for index, row in enumerate(rows):
+        if index:
+            yield ','
+        yield encoder.encode(row)
+    yield ']'
+
+
+def streaming_json_response(rows):
+    return StreamingHttpResponse(stream_json_array(rows), content_type='application/json')
+
+
+class StreamingListMixin:
+    """
+    Примесь списка: с ``?stream=1`` вся выборка отдается потоковым массивом
+    JSON, и массовая выгрузка не собирает список в памяти целиком.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_json_response(self.iter_rows(queryset))
+
+    def iter_rows(self, queryset):
+        return iter_serialized(queryset, lambda chunk: self.get_serializer(chunk, many=True).data)
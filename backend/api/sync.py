@@ -0,0 +1,211 @@
+import base64
+import json
+from contextvars import ContextVar
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from .eager_loading import plan_queryset
+from .models import Tombstone
+from .pagination import KeysetPagination
+from .row_serializers import compile_serializer
+
+INVALID_TOKEN_MESSAGE = 'Неверный токен синхронизации'
+
+# Строки, надгробия которых delete_with_tombstones уже записала одним INSERT
+_tombstoned = ContextVar('tombstoned', default=frozenset())
+
+
+class SyncPagination(KeysetPagination):
+    """Страницы синхронизации: строки и удаления каждого каталога по возрастанию id."""
+    ordering = ('id',)
+    page_size = 1000
+    max_page_size = 5000
+
+
+class SyncState:
+    """
+    Содержимое токена: изменения после ``since`` (``None`` - полная копия),
+    позиции уже отданных страниц и ``next_since`` для следующего цикла.
+    """
+
+    def __init__(self, since, next_since, after=None, done=()):
+        self.since = since
+        self.next_since = next_since
+        self.after = dict(after or {})
+        self.done = set(done)
+
+    @property
+    def started(self):
+        return bool(self.after or self.done)
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def _parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is None or moment.tzinfo is None:
+        raise ValueError(value)
+    return moment
+
+
+def encode_token(state):
+    data = {'since': state.since.isoformat() if state.since else None}
+    if state.started:
+        data.update(next_since=state.next_since.isoformat(), after=state.after, done=sorted(state.done))
+    return _encode(data)
+
+
+def decode_token(token):
+    if not token:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode()))
+        since = _parse_moment(data['since']) if data['since'] is not None else None
+        if 'next_since' not in data:
+            return SyncState(since, None)
+        after = {str(key): int(value) for key, value in data['after'].items()}
+        return SyncState(since, _parse_moment(data['next_since']), after, [str(key) for key in data['done']])
+    except (TypeError, ValueError, KeyError, AttributeError):
+        raise ValidationError({'token': [INVALID_TOKEN_MESSAGE]})
+
+
+def tombstone_horizon(now=None):
+    """Самый ранний момент, удаления после которого еще известны."""
+    return (now or timezone.now()) - timedelta(days=settings.SYNC_API['TOMBSTONE_DAYS'])
+
+
+def purge_tombstones():
+    return Tombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()[0]
+
+
+def write_tombstone(instance):
+    """
+    Записывает удаление строки каталога. Вызывается сигналом post_delete,
+    поэтому срабатывает и при каскадном удалении, и в админке.
+    """
+    key = (instance._meta.label_lower, instance.pk)
+    if key not in _tombstoned.get():
+        Tombstone.objects.create(model=key[0], object_id=key[1])
+
+
+@transaction.atomic
+def delete_with_tombstones(queryset):
+    """
+    Удаляет строки каталога и одним INSERT записывает их id для
+    синхронизации вместо отдельной записи на каждую строку.
+    """
+    ids = list(queryset.values_list('pk', flat=True))
+    if not ids:
+        return 0
+    model = queryset.model
+    label = model._meta.label_lower
+    Tombstone.objects.bulk_create(Tombstone(model=label, object_id=pk) for pk in ids)
+    token = _tombstoned.set(frozenset((label, pk) for pk in ids))
+    try:
+        return model.objects.filter(pk__in=ids).delete()[0]
+    finally:
+        _tombstoned.reset(token)
+
+
+class SyncCatalogue:
+    """
+    Каталог в ответе синхронизации: строки, у которых одна из меток
+    ``changed_fields`` новее токена, и id удаленных после него строк.
+    """
+
+    def __init__(self, name, queryset, serializer_class, changed_fields=('updated_at',)):
+        self.name = name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.changed_fields = changed_fields
+
+    @property
+    def deleted_key(self):
+        return f'{self.name}_deleted'
+
+    def changed_rows(self, since):
+        queryset = self.queryset
+        if since is not None:
+            changed = Q()
+            for field in self.changed_fields:
+                changed |= Q(**{f'{field}__gte': since})
+            queryset = queryset.filter(changed)
+        return queryset
+
+    def tombstones(self, since):
+        if since is None:
+            # Полная копия заменяет данные клиента, удаления не нужны
+            return Tombstone.objects.none()
+        return Tombstone.objects.filter(model=self.queryset.model._meta.label_lower, deleted_at__gte=since)
+
+    def page(self, queryset, key, state, paginator, page_size):
+        """Следующая страница ``queryset`` после позиции ``key`` в токене."""
+        if key in state.done:
+            return []
+        queryset = queryset.order_by(*paginator.get_order_by())
+        if key in state.after:
+            queryset = queryset.filter(paginator.get_after_filter([state.after[key]]))
+        rows = list(queryset[:page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            state.after[key] = rows[-1][0] if isinstance(rows[-1], tuple) else rows[-1].pk
+        else:
+            state.after.pop(key, None)
+            state.done.add(key)
+        return rows
+
+    def changes(self, state, paginator, page_size):
+        row_serializer = compile_serializer(self.serializer_class)
+        rows = self.changed_rows(state.since)
+        if row_serializer is not None:
+            # id первой колонкой: по нему считается позиция страницы
+            rows = self.page(rows.prefetch_related(None).values_list('id', *row_serializer.lookups),
+                             self.name, state, paginator, page_size)
+            updated = row_serializer.serialize([row[1:] for row in rows])
+        else:
+            rows = self.page(plan_queryset(rows, self.serializer_class), self.name, state, paginator, page_size)
+            updated = self.serializer_class(rows, many=True).data
+        deleted = self.page(self.tombstones(state.since).values_list('id', 'object_id'),
+                            self.deleted_key, state, paginator, page_size)
+        return {'updated': updated, 'deleted': [object_id for _, object_id in deleted]}
+
+    def keys(self):
+        return [self.name, self.deleted_key]
+
+
+def sync_changes(request, catalogues):
+    """
+    Изменения ``catalogues`` после токена ``?token=`` и токен для
+    следующего запроса. Без токена или с токеном старше хранимых удалений
+    отдается полная копия с ``reset``: клиент заменяет свои данные. Ответ
+    разбит на страницы по ``page_size`` строк каждого каталога; пока
+    ``has_more``, клиент запрашивает продолжение с новым токеном.
+    """
+    started = timezone.now()
+    # Транзакция, начатая до запроса, может записать более раннее updated_at
+    # уже после него: следующий цикл повторно захватывает этот интервал
+    next_since = started - timedelta(seconds=settings.SYNC_API['OVERLAP'])
+    state = decode_token(request.query_params.get('token'))
+    if state is None or (not state.started and state.since is not None
+                         and state.since < tombstone_horizon(started)):
+        state = SyncState(None, next_since)
+    elif not state.started:
+        state = SyncState(state.since, next_since)
+    reset = state.since is None and not state.started
+
+    paginator = SyncPagination()
+    page_size = paginator.get_page_size(request)
+    data = {}
+    for catalogue in catalogues:
+        data[catalogue.name] = catalogue.changes(state, paginator, page_size)
+    keys = [key for catalogue in catalogues for key in catalogue.keys()]
+    has_more = not state.done.issuperset(keys)
+    if not has_more:
+        state = SyncState(state.next_since, None)
+    return {'token': encode_token(state), 'reset': reset, 'has_more': has_more, **data}
@@ -0,0 +1,9 @@
+from celery import shared_task
+from api.sync import purge_tombstones
+
+
+@shared_task
+def purge_tombstones_task():
+    deleted_count = purge_tombstones()
+    print(f"Удалено {deleted_count} устаревших записей об удалении")
+    return deleted_count
@@ -0,0 +1,27 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+    """
+    Примесь TestCase: проверяет, что эндпоинт выполняет одно и то же число
+    запросов независимо от числа возвращаемых строк.
+    """
+
+    def assertConstantQueries(self, request, seed, sizes=(1, 10), expected=None):
+        """
+        Для каждого размера из ``sizes`` вызывает ``seed(count)``, добавляющий
+        ``count`` строк, затем ``request()`` и сравнивает число выполненных запросов.
+        """
+        counts = []
+        for size in sizes:
+            seed(size)
+            with CaptureQueriesContext(connection) as context:
+                request()
+            counts.append(len(context))
+        if expected is not None:
+            self.assertEqual(counts[0], expected,
+                             f'Ожидалось {expected} запросов, выполнено {counts[0]}')
+        self.assertEqual(len(set(counts)), 1,
+                         f'Число запросов растет вместе с данными: {dict(zip(sizes, counts))}')
+        return counts[0]
@@ -1,3 +1,386 @@
-from django.test import TestCase
+import time
+from datetime import datetime, date
+from itertools import count
+from unittest import skipUnless
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from events.models import Event
+from events.serializers import EventSerializer
+from exams.models import Result
+from exams.writers import create_exam_tree
+from organizations.models import Organization, Course, Enrollment
+from organizations.serializers import OrganizationSerializer, CourseSerializer
+from users.models import User
+from users.tokens import PrincipalTokenObtainPairSerializer
+from .models import Tombstone
+from .sync import delete_with_tombstones
+from .renderers import FastJSONRenderer
+from .row_serializers import compile_serializer
+from .query_plans import hot_queries, seed_plan_data, scans_sequentially, analyze
+from .testing import QueryCountAssertionsMixin
 
-# Create your tests here.
+# Размеры выборки: число запросов не должно от них зависеть
+SIZES = (1, 10)
+
+
+class QueryCountTestCase(QueryCountAssertionsMixin, TestCase):
+    """
+    Число запросов списков и карточек API. Клиент аутентифицируется
+    настоящим JWT, как в работе: роль и организация берутся из токена.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.numbers = count(1)
+        self.owner = User.objects.create_user(email='owner@example.com', password='password',
+                                              role='organization')
+        self.organization = Organization.objects.create(owner=self.owner, name='Организация')
+        self.student = User.objects.create_user(email='student@example.com', password='password')
+        self.organization_client = self.client_for(self.owner)
+        self.student_client = self.client_for(self.student)
+
+    def client_for(self, user):
+        client = APIClient()
+        token = PrincipalTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def get(self, client, url, **params):
+        def request():
+            response = client.get(url, params)
+            self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+        return request
+
+    def add_organizations(self, size):
+        for _ in range(size):
+            number = next(self.numbers)
+            owner = User.objects.create_user(email=f'org{number}@example.com', password='password',
+                                             role='organization')
+            Organization.objects.create(owner=owner, name=f'Организация {number}')
+
+    def add_courses(self, size):
+        Course.objects.bulk_create(Course(organization=self.organization, name=f'Курс {next(self.numbers)}')
+                                   for _ in range(size))
+
+    def add_events(self, size):
+        Event.objects.bulk_create(Event(external_id=f'event-{number}', title=f'Спектакль {number}',
+                                        event_type='theatre', source_url='https://example.com/')
+                                  for number in (next(self.numbers) for _ in range(size)))
+
+    def add_exam(self, questions):
+        return create_exam_tree(self.organization.pk, [
+            {'text': f'Вопрос {number}', 'number': number, 'point': 1,
+             'choices': [{'text': 'да', 'is_correct': True}, {'text': 'нет', 'is_correct': False}]}
+            for number in range(1, questions + 1)
+        ], title=f'Экзамен {next(self.numbers)}', level=1)
+
+    def add_exams(self, size):
+        for _ in range(size):
+            self.add_exam(3)
+
+    def add_results(self, exam, size):
+        users = [User.objects.create_user(email=f'user{next(self.numbers)}@example.com', password='password')
+                 for _ in range(size)]
+        Result.objects.bulk_create(Result(user=user, exam=exam, score=1) for user in users)
+
+
+class OrganizationQueryCountTests(QueryCountTestCase):
+    def test_list(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/organization/'),
+                                   self.add_organizations, SIZES, expected=2)
+
+    def test_list_page(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/organization/', page_size=5),
+                                   self.add_organizations, SIZES, expected=2)
+
+    def test_detail(self):
+        self.assertConstantQueries(
+            self.get(self.student_client, f'/api/v1/organization/{self.organization.pk}'),
+            self.add_organizations, SIZES, expected=2)
+
+    def test_own(self):
+        self.assertConstantQueries(self.get(self.organization_client, '/api/v1/organization/me'),
+                                   self.add_courses, SIZES, expected=1)
+
+
+class CourseQueryCountTests(QueryCountTestCase):
+    def test_list(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/course/'),
+                                   self.add_courses, SIZES, expected=2)
+
+    def test_list_page_with_facets(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/course/', page_size=5, facets=1),
+                                   self.add_courses, SIZES, expected=3)
+
+    def test_organization_list(self):
+        self.assertConstantQueries(self.get(self.organization_client, '/api/v1/course/'),
+                                   self.add_courses, SIZES, expected=2)
+
+    def test_detail(self):
+        course = Course.objects.create(organization=self.organization, name='Курс')
+        self.assertConstantQueries(self.get(self.student_client, f'/api/v1/course/{course.pk}'),
+                                   self.add_courses, SIZES, expected=2)
+
+    def test_enrollments(self):
+        def seed(size):
+            self.add_courses(size)
+            Enrollment.objects.bulk_create(
+                Enrollment(user=self.student, course=course)
+                for course in Course.objects.exclude(enrollments__user=self.student))
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/enrollments/'),
+                                   seed, SIZES, expected=1)
+
+
+class EventQueryCountTests(QueryCountTestCase):
+    def test_list(self):
+        self.assertConstantQueries(self.get(APIClient(), '/api/v1/events/'),
+                                   self.add_events, SIZES, expected=2)
+
+    def test_list_page_with_facets(self):
+        self.assertConstantQueries(self.get(APIClient(), '/api/v1/events/', page_size=5, facets=1),
+                                   self.add_events, SIZES, expected=3)
+
+    def test_detail(self):
+        self.add_events(1)
+        event = Event.objects.get()
+        self.assertConstantQueries(self.get(APIClient(), f'/api/v1/events/{event.pk}/'),
+                                   self.add_events, SIZES, expected=2)
+
+    def test_sync(self):
+        def seed(size):
+            self.add_events(size)
+            self.add_courses(size)
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/sync/'), seed, SIZES, expected=2)
+
+
+class ExamQueryCountTests(QueryCountTestCase):
+    def test_list(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/exam/'),
+                                   self.add_exams, SIZES, expected=5)
+
+    def test_list_page(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/exam/', page_size=5),
+                                   self.add_exams, SIZES, expected=5)
+
+    def test_organization_list(self):
+        self.assertConstantQueries(self.get(self.organization_client, '/api/v1/exam/'),
+                                   self.add_exams, SIZES, expected=5)
+
+    def test_detail(self):
+        # Карточка экзамена с разным числом вопросов; кеш ответов пуст
+        exams = []
+
+        def seed(size):
+            cache.clear()
+            exams.append(self.add_exam(size))
+
+        def request():
+            self.get(self.student_client, f'/api/v1/exam/{exams[-1].pk}')()
+        self.assertConstantQueries(request, seed, SIZES, expected=4)
+
+    def test_item_stats(self):
+        exams = []
+
+        def request():
+            self.get(self.organization_client, f'/api/v1/exam/{exams[-1].pk}/stats/items')()
+        self.assertConstantQueries(request, lambda size: exams.append(self.add_exam(size)), SIZES,
+                                   expected=3)
+
+    def test_stats(self):
+        exam = self.add_exam(3)
+        self.assertConstantQueries(self.get(self.organization_client, f'/api/v1/exam/{exam.pk}/stats'),
+                                   lambda size: self.add_results(exam, size), SIZES, expected=3)
+
+    def test_leaderboard(self):
+        exam = self.add_exam(3)
+        self.assertConstantQueries(
+            self.get(self.organization_client, f'/api/v1/exam/{exam.pk}/stats/leaderboard'),
+            lambda size: self.add_results(exam, size), SIZES, expected=2)
+
+
+class ResultQueryCountTests(QueryCountTestCase):
+    def add_own_results(self, size):
+        Result.objects.bulk_create(Result(user=self.student, exam=self.add_exam(1), score=1)
+                                   for _ in range(size))
+
+    def test_list(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/result/'),
+                                   self.add_own_results, SIZES, expected=1)
+
+    def test_list_page(self):
+        self.assertConstantQueries(self.get(self.student_client, '/api/v1/result/', page_size=5),
+                                   self.add_own_results, SIZES, expected=1)
+
+    def test_detail(self):
+        self.add_own_results(1)
+        result = Result.objects.get()
+        self.assertConstantQueries(self.get(self.student_client, f'/api/v1/result/{result.pk}'),
+                                   self.add_own_results, SIZES, expected=1)
+
+
+class SyncTombstoneTests(QueryCountTestCase):
+    """Дельта-синхронизация сообщает о строках, удаленных любым способом."""
+
+    def sync(self, token=None):
+        response = self.student_client.get('/api/v1/sync/', {'token': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cascade_from_owner(self):
+        self.add_courses(2)
+        course_ids = set(Course.objects.values_list('pk', flat=True))
+        token = self.sync()['token']
+
+        self.owner.delete()
+        self.assertFalse(Course.objects.exists())
+        delta = self.sync(token)
+        self.assertFalse(delta['reset'])
+        self.assertEqual(set(delta['courses']['deleted']), course_ids)
+
+    def test_direct_delete(self):
+        self.add_events(1)
+        event_id = Event.objects.get().pk
+        token = self.sync()['token']
+
+        Event.objects.filter(pk=event_id).delete()
+        self.assertEqual(self.sync(token)['events']['deleted'], [event_id])
+
+    def test_bulk_delete_tombstones_once(self):
+        self.add_courses(3)
+        delete_with_tombstones(Course.objects.all())
+        self.assertEqual(Tombstone.objects.count(), 3)
+        self.assertEqual(len(set(Tombstone.objects.values_list('object_id', flat=True))), 3)
+
+
+class SubmitExamTests(QueryCountTestCase):
+    """Синхронная и асинхронная проверка одинаково отклоняют некорректные ответы."""
+
+    def submit(self, data, idempotency_key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': idempotency_key} if idempotency_key else {}
+        return self.student_client.post('/api/v1/exam/submit', data, format='json', **headers)
+
+    def test_invalid_answers(self):
+        exam = self.add_exam(1)
+        for answers in (['x'], [{'question_number': 1, 'text': ['a']}], {'a': 1},
+                        [{'question_number': 'первый', 'text': 'да'}]):
+            for key in (None, f'key-{next(self.numbers)}'):
+                with self.subTest(answers=answers, asynchronous=bool(key)):
+                    response = self.submit({'exam_id': exam.pk, 'answers': answers}, key)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('answers', response.data)
+
+    def test_invalid_exam_id(self):
+        for key in (None, 'key'):
+            with self.subTest(asynchronous=bool(key)):
+                response = self.submit({'exam_id': 'первый', 'answers': [{'question_number': 1, 'text': 'да'}]},
+                                       key)
+                self.assertEqual(response.status_code, 400)
+
+    def test_valid_answers(self):
+        exam = self.add_exam(2)
+        answers = [{'question_number': 1, 'text': 'да'}, {'question_number': 2, 'text': 'нет'}]
+        response = self.submit({'exam_id': exam.pk, 'answers': answers})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['right_answers'], 1)
+        self.assertEqual(self.submit({'exam_id': exam.pk, 'answers': answers}, 'key').status_code, 202)
+
+
+class ConditionalGetTests(QueryCountTestCase):
+    def test_list_after_delete(self):
+        self.add_courses(2)
+        response = self.student_client.get('/api/v1/course/')
+        self.assertNotIn('Last-Modified', response.headers)
+
+        # Удаление не сдвигает метки: по одному If-Modified-Since 304 был бы ложным
+        Course.objects.filter(pk=Course.objects.order_by('id').first().pk).delete()
+        response = self.student_client.get('/api/v1/course/', HTTP_IF_MODIFIED_SINCE=http_date(time.time()))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_detail_last_modified(self):
+        course = Course.objects.create(organization=self.organization, name='Курс')
+        response = self.student_client.get(f'/api/v1/course/{course.pk}')
+        self.assertIn('Last-Modified', response.headers)
+        response = self.student_client.get(f'/api/v1/course/{course.pk}',
+                                           HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+class FastOutputTests(TestCase):
+    """
+    Скомпилированный сериализатор с ``FastJSONRenderer`` выдает те же байты,
+    что сериализатор DRF с ``JSONRenderer``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(email='owner@example.com', password='password', role='organization')
+        moment = timezone.make_aware(datetime(2026, 3, 1, 18, 30, 15, 123456))
+        cls.organizations = [
+            Organization.objects.create(owner=owner, name='Театр\u2028Камал', description=None, addres={
+                'city': 'Казань', 'lat': 55.7887, 'n': 1.5e-7, 'big': 1e16, 'small': 0.00001,
+                'zero': 0.0, 'nested': [{'k': 2.5e-5}, None, True], 'line': 'a\u2029b'}),
+            Organization.objects.create(owner=User.objects.create_user(email='other@example.com',
+                                                                       password='password'),
+                                        name='Пустая', addres={}),
+        ]
+        Organization.objects.filter(pk=cls.organizations[0].pk).update(created_at=moment)
+        Course.objects.create(organization=cls.organizations[0], name='Курс', description='строка\u2028',
+                              photo='courses/photo.jpg', start_date=date(2026, 9, 1), level=3)
+        Course.objects.create(organization=cls.organizations[1], name='Без фото', photo=None)
+        Course.objects.update(created_at=moment)
+        Event.objects.create(external_id='1', title='Спектакль\u2028', event_type='theatre',
+                             source_url='https://example.com/', date=moment, price_min=500, price_max=None)
+        Event.objects.create(external_id='2', title='Без даты', event_type='concert',
+                             source_url='https://example.com/', date=None, description=None)
+
+    def assertSameBytes(self, serializer_class, queryset):
+        request = RequestFactory().get('/')
+        row_serializer = compile_serializer(serializer_class)
+        self.assertIsNotNone(row_serializer)
+        fast = FastJSONRenderer().render(row_serializer.serialize(row_serializer.values(queryset), request))
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context={'request': request}).data)
+        self.assertEqual(fast, expected)
+
+    def test_events(self):
+        self.assertSameBytes(EventSerializer, Event.objects.order_by('id'))
+
+    def test_courses(self):
+        self.assertSameBytes(CourseSerializer, Course.objects.select_related('organization').order_by('id'))
+
+    def test_organizations(self):
+        self.assertSameBytes(OrganizationSerializer, Organization.objects.order_by('id'))
+
+    def test_floats(self):
+        data = [1.5e-7, 1e16, 1e-5, 1e-4, 0.1, 66.66666666666667, 1e15, -0.0, {'a': [123456.789]}]
+        for value in data:
+            with self.subTest(value):
+                self.assertEqual(FastJSONRenderer().render([value]), JSONRenderer().render([value]))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Планы запросов проверяются на PostgreSQL')
+class QueryPlanTests(TestCase):
+    """Горячие запросы читают свои таблицы через индексы."""
+
+    # Индексы gin_trgm_ops для поиска с опечатками требуют pg_trgm
+    TRIGRAM_QUERIES = ('event search', 'course search')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.objects = seed_plan_data()
+        analyze()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            cls.has_trigram = cursor.fetchone() is not None
+
+    def test_no_seq_scans(self):
+        for name, queryset, table in hot_queries(*self.objects):
+            with self.subTest(name):
+                if name in self.TRIGRAM_QUERIES and not self.has_trigram:
+                    self.skipTest('Нет расширения pg_trgm')
+                self.assertFalse(scans_sequentially(queryset, table), queryset.explain())
@@ -1,35 +1,59 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
 from .views import (OrganizationAPIView,
                     OrganizationListAPIView, CourseListAPIView,
                     CourseCreateAPIView, UserProfileView,
                     EventViewSet, ExamViewSet,
-                    submit_exam, ResultRetrieveAPIView,
+                    submit_exam, SubmissionRetrieveAPIView, exam_stats, exam_leaderboard, exam_item_stats, import_exams, export_exams, ResultRetrieveAPIView,
                     ResultListAPIView, EnrollmentViewSet,
-                    CourseDetailAPIView, OrganizationCreateRetrieveUpdateAPIView)
+                    CourseDetailAPIView, OrganizationCreateRetrieveUpdateAPIView, SyncAPIView, logout)
 
 
 router = SimpleRouter()
 router.register('events', EventViewSet, basename='events')
 router.register('enrollments', EnrollmentViewSet, basename='enrollments')
 
+event_list = EventViewSet.as_view({'get': 'list'})
+course_list = CourseListAPIView.as_view()
+exam_detail = ExamViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+result_list = ResultListAPIView.as_view()
+result_detail = ResultRetrieveAPIView.as_view()
+
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+    event_list = async_views.read_view(async_views.event_list, event_list)
+    course_list = async_views.read_view(async_views.course_list, course_list)
+    exam_detail = async_views.read_view(async_views.exam_detail, exam_detail)
+    result_list = async_views.read_view(async_views.result_list, result_list)
+    result_detail = async_views.read_view(async_views.result_detail, result_detail)
+
 urlpatterns = [
     path('v1/', include('djoser.urls')),
     path('v1/', include('djoser.urls.jwt')),
+    path('v1/jwt/logout/', logout, name='jwt-logout'),
     path('v1/user/profile/', UserProfileView.as_view(), name='user-profile'),
+    path('v1/events/', event_list, name='events-list'),
     path('v1/organization/me', OrganizationCreateRetrieveUpdateAPIView.as_view(),
          name='organization_me'),
     path('v1/organization/<int:pk>', OrganizationAPIView.as_view(),
          name='organization_detail'),
     path('v1/organization/', OrganizationListAPIView.as_view(),
          name='organization_list'),
-    path('v1/course/', CourseListAPIView.as_view(), name='course_list'),
+    path('v1/course/', course_list, name='course_list'),
     path('v1/course/create', CourseCreateAPIView.as_view(), name='course_create'),
     path('v1/course/<int:pk>', CourseDetailAPIView.as_view(), name='course_detail'),
     path('v1/exam/', ExamViewSet.as_view({'get': 'list', 'post': 'create'}), name='exam_list_create'),
-    path('v1/exam/<int:pk>', ExamViewSet.as_view({'get': 'retrieve', 'patch': 'update', 'delete': 'destroy'}), name='exam_detail'),
+    path('v1/exam/<int:pk>', exam_detail, name='exam_detail'),
+    path('v1/exam/<int:pk>/stats', exam_stats, name='exam_stats'),
+    path('v1/exam/<int:pk>/stats/leaderboard', exam_leaderboard, name='exam_leaderboard'),
+    path('v1/exam/<int:pk>/stats/items', exam_item_stats, name='exam_item_stats'),
     path('v1/exam/submit', submit_exam, name='submit_exam'),
-    path('v1/result/', ResultListAPIView.as_view(), name='result_list'),
-    path('v1/result/<int:pk>', ResultRetrieveAPIView.as_view(), name='result_detail'),
+    path('v1/exam/submission/<uuid:pk>', SubmissionRetrieveAPIView.as_view(), name='submission_detail'),
+    path('v1/exam/import', import_exams, name='exam_import'),
+    path('v1/exam/export', export_exams, name='exam_export'),
+    path('v1/result/', result_list, name='result_list'),
+    path('v1/result/<int:pk>', result_detail, name='result_detail'),
+    path('v1/sync/', SyncAPIView.as_view(), name='sync'),
     path('v1/', include(router.urls))
 ]
@@ -5,16 +5,39 @@ from django.contrib.auth import get_user_model
 from .permissions import IsOrganizationOwner
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
 from users.serializers import UserUpdateSerializer, UserSerializer
+from users.principal import get_principal
+from users.denylist import revoke_token
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from organizations.models import Organization, Course, Enrollment
 from organizations.serializers import OrganizationSerializer, CourseSerializer, EnrollmentSerializer
 from events.models import Event
 from events.serializers import EventSerializer
-from exams.models import Exam, Result
-from exams.serializers import ExamSerializer, ResultSerializer, ExamCreateSerializer, SubmitExamSerializer
+from exams.models import Exam, Question, Result, Submission
+from exams.serializers import (ExamSerializer, ResultSerializer, ExamCreateSerializer, SubmitExamSerializer,
+                               SubmitAnswerSerializer, SubmissionSerializer, LeaderboardEntrySerializer,
+                               QuestionStatsSerializer)
+from exams.submissions import evaluate_answers, accept_submission
+from exams.results import record_attempt
+from exams.stats import exam_summary, leaderboard, LEADERBOARD_SIZE
+from exams.cache import exam_payload_cache
+from exams import transfer
+from exams.writers import delete_exam_trees
 from drf_yasg.utils import swagger_auto_schema
-
-PERCENT_TO_PASS_EXAM = 60
+from .eager_loading import EagerLoadingMixin, plan_queryset
+from .pagination import (OrganizationPagination, CoursePagination, EventPagination,
+                         ExamPagination, ResultPagination, EnrollmentPagination)
+from .streaming import StreamingListMixin, wants_stream, iter_serialized, streaming_json_response
+from .row_serializers import RowListMixin, row_list_response
+from .conditional import ConditionalGetMixin, conditional_get
+from .search import SearchListMixin, EventSearch, CourseSearch
+from .sync import SyncCatalogue, sync_changes, delete_with_tombstones
+
+IDEMPOTENCY_KEY_MAX_LENGTH = Submission._meta.get_field('idempotency_key').max_length
+# В курс входит название организации
+COURSE_VALIDATOR_FIELDS = ('updated_at', 'organization__updated_at')
 
 User = get_user_model()
 
@@ -37,6 +60,10 @@ class OrganizationAPIView(generics.RetrieveAPIView):
     
     @swagger_auto_schema(response_body=OrganizationSerializer)
     def get(self, request, pk=None):
+        return conditional_get(request, Organization.objects.filter(pk=pk),
+                               lambda: self.retrieve(request, pk), single=True)
+
+    def retrieve(self, request, pk=None):
         organization = get_object_or_404(Organization, pk=pk)
         serializer = OrganizationSerializer(organization)
         return Response(serializer.data)
@@ -65,30 +92,77 @@ class OrganizationCreateRetrieveUpdateAPIView(mixins.CreateModelMixin,
         serializer.save(owner=self.request.user)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def logout(request):
+    """Отзывает текущий access-токен и, если передан, refresh-токен."""
+    if request.auth is not None:
+        revoke_token(request.auth)
+    refresh = request.data.get('refresh')
+    if refresh:
+        try:
+            revoke_token(RefreshToken(refresh))
+        except TokenError:
+            return Response({'error': 'Некорректный refresh-токен'}, status=400)
+    return Response(status=204)
+
+
 class OrganizationListAPIView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = RowListMixin.renderer_classes
 
     def get(self, request):
         organizations = Organization.objects.all()
+        return conditional_get(request, organizations, lambda: self.list(request, organizations))
+
+    def list(self, request, organizations):
+        response = row_list_response(request, organizations, OrganizationSerializer,
+                                     OrganizationPagination(), view=self)
+        if response is not None:
+            return response
+        if wants_stream(request):
+            return streaming_json_response(iter_serialized(
+                organizations, lambda chunk: OrganizationSerializer(chunk, many=True).data))
+        paginator = OrganizationPagination()
+        page = paginator.paginate_queryset(organizations, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(OrganizationSerializer(page, many=True).data)
         serializer = OrganizationSerializer(organizations, many=True)
         return Response(serializer.data)
 
 
+def visible_courses(principal):
+    if principal.is_organization:
+        # Для организаций показываем только их курсы
+        if principal.organization_id:
+            return Course.objects.filter(organization_id=principal.organization_id)
+        return Course.objects.none()
+    # Для обычных пользователей показываем все курсы
+    return Course.objects.all()
+
+
 class CourseListAPIView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = RowListMixin.renderer_classes
 
     def get(self, request):
-        if request.user.role == 'organization':
-            # Для организаций показываем только их курсы
-            organization = request.user.organizations.first()
-            if organization:
-                courses = Course.objects.filter(organization=organization)
-            else:
-                courses = Course.objects.none()
-        else:
-            # Для обычных пользователей показываем все курсы
-            courses = Course.objects.all()
-        
+        courses = visible_courses(get_principal(request))
+        search = CourseSearch(request)
+        return conditional_get(request, search.base(courses), lambda: search.add_facets(
+            self.list(request, search.filter(courses)), courses), COURSE_VALIDATOR_FIELDS)
+
+    def list(self, request, courses):
+        response = row_list_response(request, courses, CourseSerializer, CoursePagination(), view=self)
+        if response is not None:
+            return response
+        courses = plan_queryset(courses, CourseSerializer)
+        if wants_stream(request):
+            return streaming_json_response(iter_serialized(
+                courses, lambda chunk: CourseSerializer(chunk, many=True).data))
+        paginator = CoursePagination()
+        page = paginator.paginate_queryset(courses, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(CourseSerializer(page, many=True).data)
         serializer = CourseSerializer(courses, many=True)
         return Response(serializer.data)
 
@@ -113,16 +187,21 @@ class CourseDetailAPIView(views.APIView):
     
     @swagger_auto_schema(responses={200: CourseSerializer, 404: 'Course not found'})
     def get(self, request, pk=None):
-        course = get_object_or_404(Course, pk=pk)
+        return conditional_get(request, Course.objects.filter(pk=pk), lambda: self.retrieve(request, pk),
+                               COURSE_VALIDATOR_FIELDS, single=True)
+
+    def retrieve(self, request, pk=None):
+        course = get_object_or_404(plan_queryset(Course.objects.all(), CourseSerializer), pk=pk)
         serializer = CourseSerializer(course)
         return Response(serializer.data)
     
     def delete(self, request, pk=None):
         course = get_object_or_404(Course, pk=pk)
         # Проверяем, что пользователь является владельцем организации, которой принадлежит курс
-        if request.user.role != 'organization' or course.organization.owner != request.user:
+        principal = get_principal(request)
+        if not principal.is_organization or course.organization_id != principal.organization_id:
             return Response({'error': 'У вас нет прав для удаления этого курса'}, status=403)
-        course.delete()
+        delete_with_tombstones(Course.objects.filter(pk=course.pk))
         return Response({'message': 'Курс успешно удален'}, status=204)
         
     def get_permissions(self):
@@ -131,27 +210,104 @@ class CourseDetailAPIView(views.APIView):
         return [permissions.IsAuthenticated()]
 
 
-class EventViewSet(ReadOnlyModelViewSet):
+class EventViewSet(SearchListMixin, ConditionalGetMixin, RowListMixin, StreamingListMixin, ReadOnlyModelViewSet):
     queryset = Event.objects.all().order_by('date')
     serializer_class = EventSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = EventPagination
+    search_class = EventSearch
+
+class SyncAPIView(views.APIView):
+    """
+    Дельта-синхронизация каталогов событий и курсов: с ``?token=`` из
+    предыдущего ответа отдаются только измененные строки и id удаленных.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = RowListMixin.renderer_classes
+
+    def get(self, request):
+        return Response(sync_changes(request, [
+            SyncCatalogue('events', Event.objects.all(), EventSerializer),
+            SyncCatalogue('courses', visible_courses(get_principal(request)), CourseSerializer,
+                          COURSE_VALIDATOR_FIELDS),
+        ]))
+
 
-class ExamViewSet(viewsets.ModelViewSet):
+class ExamViewSet(EagerLoadingMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Exam.objects.all().order_by('level')
     serializer_class = ExamSerializer
+    pagination_class = ExamPagination
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Exam.objects.none()
-        if self.request.user.role == 'organization':
-            return self.queryset.filter(author=self.request.user.organizations.first())
+        principal = get_principal(self.request)
+        if principal.is_organization:
+            return self.queryset.filter(author_id=principal.organization_id)
         return self.queryset
     
     def get_serializer_class(self):
-        if self.request.method in ['POST', 'PUT']:
+        if self.request.method in ['POST', 'PUT', 'PATCH']:
             return ExamCreateSerializer
         return ExamSerializer
 
+    def perform_destroy(self, instance):
+        delete_exam_trees(Exam.objects.filter(pk=instance.pk))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return conditional_get(request, queryset, lambda: self.list_payloads(request, queryset, *args, **kwargs))
+
+    def list_payloads(self, request, queryset, *args, **kwargs):
+        if wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(queryset.prefetch_related(None).only('pk', 'level'))
+        if page is not None:
+            exam_ids = [exam.pk for exam in page]
+        else:
+            exam_ids = list(queryset.prefetch_related(None).values_list('pk', flat=True))
+        payloads = self.get_cached_payloads(queryset, exam_ids)
+        data = [payloads[exam_id] for exam_id in exam_ids if exam_id in payloads]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def iter_rows(self, queryset):
+        def serialize(exams):
+            exam_ids = [exam.pk for exam in exams]
+            payloads = self.get_cached_payloads(queryset, exam_ids)
+            return [payloads[exam_id] for exam_id in exam_ids if exam_id in payloads]
+        return iter_serialized(queryset.prefetch_related(None).only('pk'), serialize)
+
+    def retrieve(self, request, *args, **kwargs):
+        exam_id = int(kwargs['pk'])
+        return conditional_get(request, self.get_queryset().filter(pk=exam_id),
+                               lambda: self.retrieve_payload(request, exam_id), single=True)
+
+    def retrieve_payload(self, request, exam_id):
+        versions = exam_payload_cache.get_versions([exam_id])
+        payload = exam_payload_cache.get_many(versions).get(exam_id)
+        if payload is None:
+            payload = self.get_serializer(self.get_object()).data
+            exam_payload_cache.set_many({exam_id: payload}, versions)
+        else:
+            principal = get_principal(request)
+            if principal.is_organization and payload['author'] != principal.organization_id:
+                # Организациям доступны только собственные экзамены
+                raise Http404
+        return Response(payload)
+
+    def get_cached_payloads(self, queryset, exam_ids):
+        versions = exam_payload_cache.get_versions(exam_ids)
+        payloads = exam_payload_cache.get_many(versions)
+        missing = [exam_id for exam_id in exam_ids if exam_id not in payloads]
+        if missing:
+            exams = queryset.filter(pk__in=missing)
+            serialized = {exam['id']: exam for exam in self.get_serializer(exams, many=True).data}
+            exam_payload_cache.set_many(serialized, versions)
+            payloads.update(serialized)
+        return payloads
+
     def get_permissions(self):
         if self.request.method in ['POST', 'PUT', 'DELETE', 'PATCH']:
             return [permissions.IsAuthenticated(), IsOrganizationOwner()]
@@ -162,46 +318,165 @@ class ExamViewSet(viewsets.ModelViewSet):
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def submit_exam(request):
+    """
+    Проверка ответов. С заголовком ``Idempotency-Key`` (или полем
+    ``idempotency_key``) ответы ставятся в очередь: возвращается 202 и id
+    попытки для опроса, повтор с тем же ключом возвращает ту же попытку.
+    """
     exam_id = request.data.get('exam_id')
     answers = request.data.get('answers', [])
 
     if not exam_id or not answers:
         return Response({'error': 'exam_id и answers обязательны'}, status=400)
 
+    try:
+        exam_id = int(exam_id)
+    except (TypeError, ValueError):
+        return Response({'error': 'Некорректный exam_id'}, status=400)
+    # Одинаковая проверка для обеих веток: в очередь попадают только корректные ответы
+    serializer = SubmitAnswerSerializer(data=answers, many=True)
+    if not serializer.is_valid():
+        return Response({'answers': serializer.errors}, status=400)
+    answers = serializer.validated_data
+
+    idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    if idempotency_key:
+        return submit_exam_async(request, exam_id, answers, str(idempotency_key))
+
     exam = get_object_or_404(Exam, id=exam_id)
-    score = 0
-    right_answers = 0
-    for answer in answers:
-        question_number = answer['question_number']
-        text = answer['text']
-        if not question_number or not text:
-            continue
-
-        question = exam.questions.filter(number=question_number).first()
-        if not question:
-            continue
-
-        selected_choice = question.choices.filter(text=text).first()
-        if selected_choice and selected_choice.is_correct:
-            score += question.point
-            right_answers += 1
-
-    result_percent = score / exam.total_points * 100
-    passed = result_percent >= PERCENT_TO_PASS_EXAM
-
-    if passed:
-        result = Result.objects.filter(user=request.user, exam=exam).first()
-        if result:
-            if result.score < score:
-                result.score = score
-                result.save()
-        result = Result.objects.create(user=request.user, exam=exam, score=score)
-    return Response({
-        'result': 'passed' if passed else 'failed',
-        'score': score,
-        'percent': result_percent,
-        'right_answers': right_answers
-    }, status=200)
+    outcome = evaluate_answers(exam.pk, answers)
+    record_attempt(request.user.pk, exam.pk, outcome)
+    outcome.pop('passed')
+    outcome.pop('choice_ids')
+    return Response(outcome, status=200)
+
+
+def submit_exam_async(request, exam_id, answers, idempotency_key):
+    # exam_id и answers уже проверены в submit_exam
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return Response({'error': 'Слишком длинный ключ идемпотентности'}, status=400)
+    if not Exam.objects.filter(pk=exam_id).exists():
+        raise Http404
+
+    submission, created = accept_submission(request.user, exam_id, idempotency_key, answers)
+    if submission is None:
+        raise Http404
+    if submission.exam_id != exam_id:
+        return Response({'error': 'Ключ идемпотентности уже использован для другого экзамена'}, status=409)
+    status = 202 if submission.status == Submission.PENDING else 200
+    return Response(SubmissionSerializer(submission).data, status=status)
+
+
+class SubmissionRetrieveAPIView(generics.RetrieveAPIView):
+    serializer_class = SubmissionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Submission.objects.none()
+        return Submission.objects.filter(user=self.request.user)
+
+
+def _own_exam(request, pk):
+    # Статистика экзамена доступна только организации-автору
+    organization_id = get_principal(request).organization_id
+    if organization_id is None:
+        raise Http404
+    return get_object_or_404(Exam.objects.only('pk', 'author_id'), pk=pk, author_id=organization_id)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def exam_stats(request, pk):
+    """
+    Сводка по экзамену: число попыток, доля сдавших, средний балл,
+    распределение по процентам и лучшие результаты.
+    """
+    exam = _own_exam(request, pk)
+    data = exam_summary(exam)
+    data['top'] = LeaderboardEntrySerializer(leaderboard(exam), many=True).data
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def exam_leaderboard(request, pk):
+    """Лучшие результаты экзамена, ``?limit=`` до 100."""
+    exam = _own_exam(request, pk)
+    try:
+        limit = int(request.query_params.get('limit', LEADERBOARD_SIZE))
+    except ValueError:
+        return Response({'error': 'limit должен быть числом'}, status=400)
+    return Response(LeaderboardEntrySerializer(leaderboard(exam, max(limit, 1)), many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def exam_item_stats(request, pk):
+    """
+    Анализ вопросов экзамена: доля правильных ответов, различающая
+    способность и частота выбора вариантов. Пересчитывается периодически.
+    """
+    exam = _own_exam(request, pk)
+    questions = plan_queryset(Question.objects.filter(exam=exam).order_by('number'), QuestionStatsSerializer)
+    return Response(QuestionStatsSerializer(questions, many=True).data)
+
+
+def _transfer_format(request, default='ndjson'):
+    file_format = request.query_params.get('type')
+    if file_format is None:
+        content_type = request.content_type or ''
+        filename = getattr(request.FILES.get('file'), 'name', '') if 'multipart' in content_type else ''
+        file_format = 'csv' if 'csv' in content_type or filename.endswith('.csv') else default
+    return file_format
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, IsOrganizationOwner])
+def import_exams(request):
+    """
+    Массовый импорт экзаменов из NDJSON или CSV: файл в поле ``file``
+    (multipart) либо тело запроса целиком. Формат — ``?type=ndjson|csv``.
+    """
+    file_format = _transfer_format(request)
+    if file_format not in transfer.FORMATS:
+        return Response({'error': f'Поддерживаемые форматы: {", ".join(transfer.FORMATS)}'}, status=400)
+    organization_id = get_principal(request).organization_id
+    if organization_id is None:
+        return Response({'error': 'Сначала создайте организацию'}, status=400)
+
+    if 'multipart' in (request.content_type or ''):
+        source = request.FILES.get('file')
+        if source is None:
+            return Response({'error': 'Файл не передан'}, status=400)
+    else:
+        source = request.stream
+    if source is None:
+        return Response({'error': 'Пустой запрос'}, status=400)
+
+    report = transfer.import_exams(transfer.decode_lines(source), organization_id, file_format)
+    status = 400 if report.failed and not report.created else 200
+    return Response(report.as_dict(), status=status)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_exams(request):
+    """
+    Потоковая выгрузка экзаменов организации в NDJSON или CSV (``?type=``).
+    """
+    file_format = request.query_params.get('type', 'ndjson')
+    if file_format not in transfer.FORMATS:
+        return Response({'error': f'Поддерживаемые форматы: {", ".join(transfer.FORMATS)}'}, status=400)
+    principal = get_principal(request)
+    if not principal.is_organization:
+        return Response({'error': 'Выгрузка доступна только организациям'}, status=403)
+
+    exams = Exam.objects.filter(author_id=principal.organization_id)
+    response = StreamingHttpResponse(transfer.export_exams(exams, file_format),
+                                     content_type=transfer.CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="exams.{file_format}"'
+    return response
 
 
 class ResultRetrieveAPIView(generics.RetrieveAPIView):
@@ -220,20 +495,25 @@ class ResultRetrieveAPIView(generics.RetrieveAPIView):
         return obj
 
 
-class ResultListAPIView(generics.ListAPIView):
+class ResultListAPIView(RowListMixin, EagerLoadingMixin, StreamingListMixin, generics.ListAPIView):
     serializer_class = ResultSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ResultPagination
 
     def get_queryset(self):
         user = self.request.user
         return Result.objects.filter(user=user).order_by('-completed_at')
 
 
-class EnrollmentViewSet(mixins.CreateModelMixin,
+class EnrollmentViewSet(RowListMixin,
+                        EagerLoadingMixin,
+                        StreamingListMixin,
+                        mixins.CreateModelMixin,
                         mixins.ListModelMixin,
                         viewsets.GenericViewSet):
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = EnrollmentPagination
 
     def get_queryset(self):
         return Enrollment.objects.filter(user=self.request.user)
@@ -0,0 +1,128 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+import httpx
+from django.conf import settings
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Асинхронное ведро токенов: в среднем ``rate`` запросов в секунду,
+    всплесками до ``capacity`` запросов.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """
+    Параллельная загрузка страниц через пул keep-alive соединений: ограничение
+    числа одновременных запросов и частоты (ведро токенов) на хост, таймауты и
+    повторы с экспоненциальной задержкой. ``transport`` заменяет сетевой
+    транспорт клиента, например на ``httpx.MockTransport``.
+    """
+
+    def __init__(self, rate=2.0, burst=2, concurrency=4, timeout=10.0,
+                 retries=3, backoff=0.5, headers=None, transport=None):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = headers or DEFAULT_HEADERS
+        self.transport = transport
+        self.client = None
+        self._buckets = {}
+        self._semaphores = {}
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        config = getattr(settings, 'EVENTS_SCRAPER', {})
+        kwargs = {
+            'rate': config.get('RATE', 2.0),
+            'burst': config.get('BURST', 2),
+            'concurrency': config.get('CONCURRENCY', 4),
+            'timeout': config.get('TIMEOUT', 10.0),
+            'retries': config.get('RETRIES', 3),
+            'backoff': config.get('BACKOFF', 0.5),
+        }
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=None,
+                                max_keepalive_connections=self.concurrency * 4),
+            transport=self.transport,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    def _host_limits(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._semaphores[host], self._buckets[host]
+
+    async def request(self, url, headers=None):
+        """
+        Загружает ``url`` и возвращает ответ или ``None``, если все попытки
+        не удались. Ошибки соединения, таймауты и ответы 429/5xx повторяются.
+        """
+        semaphore, bucket = self._host_limits(url)
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                await bucket.acquire()
+                try:
+                    response = await self.client.get(url, headers=headers)
+                except httpx.TransportError as e:
+                    error = e
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        return response
+                    error = f'HTTP {response.status_code}'
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+        print(f"Не удалось загрузить {url}: {error}")
+        return None
+
+    async def fetch(self, url):
+        response = await self.request(url)
+        if response is None or response.status_code != 200:
+            return None
+        return response.text
+
+    async def fetch_all(self, urls):
+        urls = list(dict.fromkeys(urls))
+        pages = await asyncio.gather(*(self.fetch(url) for url in urls))
+        return dict(zip(urls, pages))
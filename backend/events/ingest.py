@@ -0,0 +1,103 @@
+from operator import itemgetter
+from django.db import transaction
+from events.models import Event
+
+EVENT_FIELDS = ['title', 'description', 'date', 'venue', 'price', 'price_min', 'price_max',
+                'image_url', 'event_type', 'source_url']
+INGEST_BATCH_SIZE = 500
+
+
+def _event_values(event_data, existing):
+    values = {
+        'title': event_data['title'],
+        'date': event_data['date'],
+        'venue': event_data['venue'],
+        'price': event_data.get('price', ''),
+        'price_min': event_data.get('price_min'),
+        'price_max': event_data.get('price_max'),
+        'image_url': event_data.get('image_url', ''),
+        'event_type': event_data['event_type'],
+        'source_url': event_data['source_url'],
+    }
+    if 'description' in event_data:
+        values['description'] = event_data['description']
+    else:
+        # Страница не менялась: оставляем сохраненное описание
+        values['description'] = existing.description if existing else ''
+    return values
+
+
+OUTCOMES = ('created', 'updated', 'unchanged')
+
+
+def count_outcomes(outcomes, order=OUTCOMES):
+    """Число ключей ``outcomes`` с каждым исходом из ``order``."""
+    counts = dict.fromkeys(order, 0)
+    for outcome in outcomes.values():
+        counts[outcome] += 1
+    return counts
+
+
+def merge_outcomes(shard_outcomes, order=OUTCOMES):
+    """
+    Один исход на ключ для результатов шардов с общими ключами: событие,
+    созданное одним шардом и неизмененное для другого, создано.
+    ``order`` перечисляет исходы от сильнейшего.
+    """
+    merged = {}
+    for outcomes in shard_outcomes:
+        for key, outcome in outcomes.items():
+            if key not in merged or order.index(outcome) < order.index(merged[key]):
+                merged[key] = outcome
+    return merged
+
+
+def ingest_event_outcomes(events_data, batch_size=INGEST_BATCH_SIZE):
+    """
+    Сохраняет разобранные события пачками в одной транзакции.
+
+    Каждая пачка сравнивается с сохраненными строками, и только новые или
+    измененные события пишутся одним INSERT ... ON CONFLICT. Возвращает
+    ``{external_id: исход}``, исход - одно из ``OUTCOMES``.
+    """
+    # Одно событие может попасть в несколько подборок. Строки пишутся по
+    # возрастанию external_id: параллельные шарды с общими событиями
+    # блокируют их в одном порядке и не попадают во взаимную блокировку
+    events_data = sorted({event_data['external_id']: event_data for event_data in events_data}.values(),
+                         key=itemgetter('external_id'))
+    outcomes = {}
+
+    with transaction.atomic():
+        for start in range(0, len(events_data), batch_size):
+            batch = events_data[start:start + batch_size]
+            existing = Event.objects.in_bulk(
+                [event_data['external_id'] for event_data in batch],
+                field_name='external_id',
+            )
+            to_write = []
+            for event_data in batch:
+                external_id = event_data['external_id']
+                obj = existing.get(external_id)
+                values = _event_values(event_data, obj)
+                if obj is None:
+                    outcomes[external_id] = 'created'
+                elif any(getattr(obj, field) != value for field, value in values.items()):
+                    outcomes[external_id] = 'updated'
+                else:
+                    outcomes[external_id] = 'unchanged'
+                    continue
+                to_write.append(Event(external_id=external_id, **values))
+
+            if to_write:
+                Event.objects.bulk_create(
+                    to_write,
+                    update_conflicts=True,
+                    unique_fields=['external_id'],
+                    update_fields=EVENT_FIELDS + ['updated_at'],
+                )
+    return outcomes
+
+
+def ingest_events(events_data, batch_size=INGEST_BATCH_SIZE):
+    """Как ``ingest_event_outcomes``, но возвращает число созданных, обновленных и неизмененных."""
+    return count_outcomes(ingest_event_outcomes(events_data, batch_size))
@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from events.parser import EXTRACTORS, get_extractor, parse_yandex_afisha, parse_event_page
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'fixtures' / 'afisha'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время и память парсеров Афиши на сохраненных страницах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=str(FIXTURES_DIR),
+                            help='Каталог с подборками (*.html) и страницами событий (events/*.html)')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--backend', action='append', choices=sorted(EXTRACTORS),
+                            help='Какие парсеры сравнивать (по умолчанию все)')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        selections = [page.read_text() for page in sorted(path.glob('*.html'))]
+        details = [page.read_text() for page in sorted(path.glob('events/*.html'))]
+        if not selections:
+            raise CommandError(f'В {path} нет страниц подборок')
+
+        reference = reference_name = None
+        for name in options['backend'] or sorted(EXTRACTORS):
+            extractor = get_extractor(name)
+            if extractor.name != name:
+                self.stdout.write(f'{name}: недоступен, пропущен')
+                continue
+
+            def run():
+                events = [parse_yandex_afisha(html, 'https://afisha.yandex.ru/', 'theatre', name)
+                          for html in selections]
+                descriptions = [parse_event_page(html, name) for html in details]
+                return events, descriptions
+
+            output = run()
+            if reference is None:
+                reference, reference_name = output, name
+            elif output != reference:
+                self.stdout.write(self.style.WARNING(f'{name}: результат отличается от {reference_name}'))
+
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                run()
+            elapsed = (time.perf_counter() - started) / options['repeat']
+
+            # tracemalloc видит только объекты Python: дерево libxml2 в пик не входит
+            tracemalloc.start()
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            cards = sum(len(events) for events in output[0])
+            self.stdout.write(
+                f'{name:>10}: {elapsed * 1000:8.1f} мс за проход '
+                f'({len(selections)} подборок, {cards} карточек, {len(details)} страниц), '
+                f'пик памяти {peak / 1024 / 1024:.1f} МБ'
+            )
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:53
+
+import re
+from django.db import migrations, models
+
+# Копия events.parser.parse_price на момент миграции: последующие правки
+# парсера или удаление функции не должны менять и ломать эту миграцию
+PRICE_NUMBER_RE = re.compile(r'\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+')
+FREE_PRICE_WORDS = ('бесплатно', 'вход свободный')
+
+
+def parse_price(price_str):
+    text = (price_str or '').lower()
+    if any(word in text for word in FREE_PRICE_WORDS):
+        return 0, 0
+    numbers = [int(re.sub(r'\D', '', number)) for number in PRICE_NUMBER_RE.findall(text)]
+    if not numbers:
+        return None, None
+    if len(numbers) > 1:
+        return min(numbers), max(numbers)
+    if text.startswith('от'):
+        return numbers[0], None
+    if text.startswith('до'):
+        return None, numbers[0]
+    return numbers[0], numbers[0]
+
+
+def backfill_prices(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    events = list(Event.objects.exclude(price='').only('id', 'price'))
+    for event in events:
+        event.price_min, event.price_max = parse_price(event.price)
+    Event.objects.bulk_update(events, ['price_min', 'price_max'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='price_max',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='price_min',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'price_min'], name='event_date_price_idx'),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,12 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 
+# Русская морфология плюс точные словоформы: для татарского нет словаря Postgres.
+# Запросы поиска должны использовать это же выражение, иначе индекс не подойдет
+SEARCH_VECTOR = (SearchVector('title', 'description', 'venue', config='russian')
+                 + SearchVector('title', 'description', 'venue', config='simple'))
+
 
 class Event(models.Model):
     EVENT_TYPES = (
@@ -13,6 +20,9 @@ class Event(models.Model):
     date = models.DateTimeField(null=True, blank=True)
     venue = models.CharField(max_length=255, blank=True)
     price = models.CharField(max_length=100, blank=True)
+    # Разобранная цена в рублях; NULL - граница неизвестна ("от 500 ₽" без максимума)
+    price_min = models.PositiveIntegerField(null=True, blank=True)
+    price_max = models.PositiveIntegerField(null=True, blank=True)
     image_url = models.URLField(max_length=500, blank=True)
     event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
     source_url = models.URLField(max_length=500)
@@ -21,6 +31,27 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['date']
+        indexes = [
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            # Очистка прошедших мероприятий: date IS NOT NULL AND date < now()
+            models.Index(fields=['date'], condition=models.Q(date__isnull=False),
+                         name='event_dated_idx'),
+            # "До N рублей в эти выходные": диапазон дат с фильтром цены в индексе
+            models.Index(fields=['date', 'price_min'], name='event_date_price_idx'),
+            GinIndex(SEARCH_VECTOR, name='event_search_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='event_title_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.date})"
+
+
+class SourcePage(models.Model):
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
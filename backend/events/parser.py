@@ -1,94 +1,239 @@
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+from datetime import datetime, timedelta
 from urllib.parse import urljoin
+from django.conf import settings
 from django.utils import timezone
 
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
 
-def parse_yandex_afisha(url, event_type):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, 'html.parser')
+MONTH_MAP = {
+    'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4,
+    'мая': 5, 'июня': 6, 'июля': 7, 'августа': 8,
+    'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
+}
+# Афиша показывает предстоящие события: дата старше этого срока относится к следующему году
+PAST_EVENT_GRACE = timedelta(days=30)
+# 1 200, 2 500 000: пробелы между разрядами
+PRICE_NUMBER_RE = re.compile(r'\d{1,3}(?:[ \u00a0\u202f]\d{3})+|\d+')
+FREE_PRICE_WORDS = ('бесплатно', 'вход свободный')
 
-    events = []
-    event_cards = soup.find_all('div', {'data-component': 'EventCard'})
 
-    for card in event_cards:
-        try:
-            external_id = card.get('data-event-id')
-            title = card.find('h2', {'data-test-id': 'eventCard.eventInfoTitle'}).get_text(strip=True)
+class SoupExtractor:
+    """
+    Эталонный разборщик: полное дерево BeautifulSoup через html.parser.
+    """
 
-            date_item = card.find('li', class_='DetailsItem-fq4hbj-1')
-            date_str = date_item.get_text(strip=True) if date_item else ''
-
-            date = None
-            if date_str:
-                try:
-                    day_month, time = date_str.split(', ')
-                    day, month = day_month.split()
-                    month_map = {
-                        'января': 1, 'февраля': 2, 'марта': 3, 'апреля': 4,
-                        'мая': 5, 'июня': 6, 'июля': 7, 'августа': 8,
-                        'сентября': 9, 'октября': 10, 'ноября': 11, 'декабря': 12
-                    }
-                    naive_date = datetime(
-                        year=datetime.now().year,
-                        month=month_map.get(month.lower(), 1),
-                        day=int(day),
-                        hour=int(time.split(':')[0]),
-                        minute=int(time.split(':')[1])
-                    )
-                    date = timezone.make_aware(naive_date, timezone.get_current_timezone())
-                except (ValueError, AttributeError) as e:
-                    date = None
+    name = 'soup'
 
-            venue = card.find('a', class_='PlaceLink-fq4hbj-2')
-            venue = venue.get('title') if venue else ''
+    def make_soup(self, html):
+        return BeautifulSoup(html, 'html.parser')
 
-            price_block = card.find('span', class_='PriceBlock-njdnt8-11')
-            price = price_block.get_text(strip=True).replace('\xa0', ' ') if price_block else ''
+    def make_description_soup(self, html):
+        return BeautifulSoup(html, 'html.parser')
 
+    def cards(self, html):
+        soup = self.make_soup(html)
+        for card in soup.find_all('div', {'data-component': 'EventCard'}):
+            title = card.find('h2', {'data-test-id': 'eventCard.eventInfoTitle'})
+            date_item = card.find('li', class_='DetailsItem-fq4hbj-1')
+            venue = card.find('a', class_='PlaceLink-fq4hbj-2')
+            price_block = card.find('span', class_='PriceBlock-njdnt8-11')
             img = card.find('img')
-            image_url = img.get('src') if img else ''
-
             event_link = card.find('a', {'data-test-id': 'eventCard.link'})
-            source_url = urljoin(url, event_link.get('href')) if event_link else ''
-
+            yield {
+                'external_id': card.get('data-event-id'),
+                'title': title.get_text(strip=True) if title else None,
+                'date': date_item.get_text(strip=True) if date_item else '',
+                'venue': venue.get('title') if venue else '',
+                'price': price_block.get_text(strip=True) if price_block else '',
+                'image_url': img.get('src') if img else '',
+                'href': event_link.get('href') if event_link else None,
+            }
+
+    def description(self, html):
+        soup = self.make_description_soup(html)
+        desc_block = soup.find('div', {'data-component': 'EventInfo_Description'})
+        if desc_block:
+            return desc_block.get_text(strip=True, separator='\n')
+        return ''
+
+
+class StrainerExtractor(SoupExtractor):
+    """
+    BeautifulSoup, ограниченный SoupStrainer узлами карточек и описания:
+    остальная страница не превращается в дерево.
+    """
+
+    name = 'strainer'
+    card_strainer = SoupStrainer('div', attrs={'data-component': 'EventCard'})
+    description_strainer = SoupStrainer('div', attrs={'data-component': 'EventInfo_Description'})
+
+    def make_soup(self, html):
+        return BeautifulSoup(html, 'html.parser', parse_only=self.card_strainer)
+
+    def make_description_soup(self, html):
+        return BeautifulSoup(html, 'html.parser', parse_only=self.description_strainer)
+
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+def _text(element, separator=''):
+    return separator.join(text.strip() for text in element.itertext() if text.strip())
+
+
+class LxmlExtractor:
+    """
+    Разборщик на libxml2 с заранее скомпилированными XPath.
+    """
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self.find_cards = etree.XPath('//div[@data-component="EventCard"]')
+        self.find_title = etree.XPath('(.//h2[@data-test-id="eventCard.eventInfoTitle"])[1]')
+        self.find_date = etree.XPath(f'(.//li[{_has_class("DetailsItem-fq4hbj-1")}])[1]')
+        self.find_venue = etree.XPath(f'(.//a[{_has_class("PlaceLink-fq4hbj-2")}])[1]')
+        self.find_price = etree.XPath(f'(.//span[{_has_class("PriceBlock-njdnt8-11")}])[1]')
+        self.find_img = etree.XPath('(.//img)[1]')
+        self.find_link = etree.XPath('(.//a[@data-test-id="eventCard.link"])[1]')
+        self.find_description = etree.XPath('(//div[@data-component="EventInfo_Description"])[1]')
+
+    def _first(self, xpath, element):
+        found = xpath(element)
+        return found[0] if found else None
+
+    def cards(self, html):
+        root = lxml.html.fromstring(html)
+        for card in self.find_cards(root):
+            title = self._first(self.find_title, card)
+            date_item = self._first(self.find_date, card)
+            venue = self._first(self.find_venue, card)
+            price_block = self._first(self.find_price, card)
+            img = self._first(self.find_img, card)
+            event_link = self._first(self.find_link, card)
+            yield {
+                'external_id': card.get('data-event-id'),
+                'title': _text(title) if title is not None else None,
+                'date': _text(date_item) if date_item is not None else '',
+                'venue': venue.get('title') if venue is not None else '',
+                'price': _text(price_block) if price_block is not None else '',
+                'image_url': img.get('src') if img is not None else '',
+                'href': event_link.get('href') if event_link is not None else None,
+            }
+
+    def description(self, html):
+        desc_block = self._first(self.find_description, lxml.html.fromstring(html))
+        if desc_block is not None:
+            return _text(desc_block, separator='\n')
+        return ''
+
+
+EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (SoupExtractor, StrainerExtractor, LxmlExtractor)
+}
+_extractors = {}
+
+
+def get_extractor(name=None):
+    """
+    Разборщик по имени (по умолчанию ``EVENTS_PARSER_BACKEND``). Без
+    установленного lxml используется разборщик BeautifulSoup.
+    """
+    name = name or getattr(settings, 'EVENTS_PARSER_BACKEND', 'lxml')
+    if name == 'lxml' and lxml is None:
+        name = 'soup'
+    if name not in _extractors:
+        _extractors[name] = EXTRACTORS[name]()
+    return _extractors[name]
+
+
+def parse_date(date_str, now=None):
+    """
+    Дата карточки Афиши вида ``5 февраля, 19:00`` с часовым поясом. Год
+    не указан: берется первый, начиная с прошлого, в котором дата не
+    старше ``PAST_EVENT_GRACE``. В декабре ``3 января`` - это январь
+    следующего года.
+    """
+    if not date_str:
+        return None
+    try:
+        day_month, time = date_str.split(', ')
+        day, month = day_month.split()
+        hour, minute = time.split(':')
+        month, day, hour, minute = MONTH_MAP.get(month.lower(), 1), int(day), int(hour), int(minute)
+    except (ValueError, AttributeError):
+        return None
+    now = timezone.localtime(now)
+    for year in (now.year - 1, now.year, now.year + 1):
+        try:
+            aware_date = timezone.make_aware(datetime(year, month, day, hour, minute), now.tzinfo)
+        except ValueError:
+            # 29 февраля не в високосный год
+            continue
+        if aware_date >= now - PAST_EVENT_GRACE:
+            return aware_date
+    return None
+
+
+def parse_price(price_str):
+    """
+    ``(price_min, price_max)`` в рублях из цены карточки вида ``от 500 ₽``,
+    ``800 – 2 500 ₽`` или ``Бесплатно``; неизвестная граница - ``None``.
+    """
+    text = (price_str or '').lower()
+    if any(word in text for word in FREE_PRICE_WORDS):
+        return 0, 0
+    numbers = [int(re.sub(r'\D', '', number)) for number in PRICE_NUMBER_RE.findall(text)]
+    if not numbers:
+        return None, None
+    if len(numbers) > 1:
+        return min(numbers), max(numbers)
+    if text.startswith('от'):
+        return numbers[0], None
+    if text.startswith('до'):
+        return None, numbers[0]
+    return numbers[0], numbers[0]
+
+
+def parse_yandex_afisha(html, url, event_type, backend=None):
+    events = []
+    for card in get_extractor(backend).cards(html):
+        try:
+            if card['title'] is None:
+                raise ValueError('нет заголовка')
+            href = card['href']
+            price_min, price_max = parse_price(card['price'])
             events.append({
-                'title': title,
-                'date': date,
-                'venue': venue,
-                'price': price,
-                'image_url': image_url,
+                'title': card['title'],
+                'date': parse_date(card['date']),
+                'venue': card['venue'],
+                'price': card['price'].replace('\xa0', ' '),
+                'price_min': price_min,
+                'price_max': price_max,
+                'image_url': card['image_url'],
                 'event_type': event_type,
-                'source_url': source_url,
-                'external_id': external_id
+                'source_url': urljoin(url, href) if href else '',
+                'external_id': card['external_id']
             })
 
         except Exception as e:
             print(f"Ошибка при парсинге карточки: {e}")
             continue
 
-    print(events)
-
     return events
 
 
-def parse_event_page(url, headers):
+def parse_event_page(html, backend=None):
     try:
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        description = ''
-        desc_block = soup.find('div', {'data-component': 'EventInfo_Description'})
-        if desc_block:
-            description = desc_block.get_text(strip=True, separator='\n')
-
-        print(description)
-
-        return {'description': description}
+        return {'description': get_extractor(backend).description(html)}
     except Exception as e:
         print(f"Ошибка при парсинге страницы события: {e}")
         return {}
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+from operator import attrgetter
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from events.models import Event, SourcePage
+from events.fetcher import AsyncFetcher
+from events.ingest import count_outcomes
+from events.parser import parse_yandex_afisha, parse_event_page
+
+# Исходы загрузки страниц событий, от лучшего
+PAGE_OUTCOMES = ('fetched', 'unchanged', 'not_modified', 'failed')
+
+
+class ScrapeResult:
+    """
+    Разобранные предстоящие события и учет страниц событий одного прохода.
+    ``page_outcomes`` сопоставляет каждой запрошенной странице события одно
+    из ``PAGE_OUTCOMES``.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.pages = {}
+        self.page_outcomes = {}
+
+    def stats(self):
+        return page_stats(self.page_outcomes)
+
+
+def page_stats(page_outcomes):
+    return {f'pages_{outcome}': count
+            for outcome, count in count_outcomes(page_outcomes, PAGE_OUTCOMES).items()}
+
+
+def load_source_pages(events):
+    """
+    Сохраненные валидаторы страниц событий, которые уже есть в БД.
+    Страницы новых событий всегда загружаются целиком.
+    """
+    existing = set(Event.objects
+                   .filter(external_id__in=[event_data['external_id'] for event_data in events])
+                   .values_list('source_url', flat=True))
+    return {page.url: page for page in SourcePage.objects.filter(url__in=existing)}
+
+
+async def fetch_detail_page(fetcher, url, page, result):
+    headers = {}
+    if page is not None:
+        if page.etag:
+            headers['If-None-Match'] = page.etag
+        if page.last_modified:
+            headers['If-Modified-Since'] = page.last_modified
+
+    response = await fetcher.request(url, headers=headers)
+    if response is None or response.status_code not in (200, 304):
+        result.page_outcomes[url] = 'failed'
+        return None
+    if response.status_code == 304:
+        result.page_outcomes[url] = 'not_modified'
+        return None
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    result.pages[url] = SourcePage(
+        url=url,
+        etag=response.headers.get('ETag', ''),
+        last_modified=response.headers.get('Last-Modified', ''),
+        content_hash=content_hash,
+    )
+    if page is not None and page.content_hash == content_hash:
+        result.page_outcomes[url] = 'unchanged'
+        return None
+    result.page_outcomes[url] = 'fetched'
+    return response.text
+
+
+async def scrape_events(sources, fetcher=None):
+    """
+    Параллельно загружает страницы подборок, а затем страницы всех
+    предстоящих событий. Страницы событий запрашиваются условно, разбираются
+    только изменившиеся: их события получают ключ ``description``.
+    """
+    fetcher = fetcher or AsyncFetcher.from_settings()
+    result = ScrapeResult()
+    async with fetcher:
+        pages = await fetcher.fetch_all(url for url, _ in sources)
+
+        for url, event_type in sources:
+            print(f"Обработка {url}...")
+            html = pages.get(url)
+            if html is None:
+                continue
+            try:
+                events_data = parse_yandex_afisha(html, url, event_type)
+            except Exception as e:
+                print(f"Ошибка при обработке {url}: {e}")
+                continue
+            now = timezone.now()
+            result.events.extend(event_data for event_data in events_data
+                                 if event_data['date'] and event_data['date'] >= now)
+
+        source_pages = await sync_to_async(load_source_pages)(result.events)
+        urls = list(dict.fromkeys(event_data['source_url'] for event_data in result.events
+                                  if event_data.get('source_url')))
+        details = {}
+        for url, html in zip(urls, await asyncio.gather(*(
+                fetch_detail_page(fetcher, url, source_pages.get(url), result) for url in urls))):
+            if html is not None:
+                details[url] = html
+
+    for event_data in result.events:
+        html = details.get(event_data.get('source_url'))
+        if html is not None:
+            event_data.update(parse_event_page(html))
+    return result
+
+
+def save_source_pages(pages):
+    # По возрастанию url, как события в ingest: общие страницы шардов блокируются в одном порядке
+    SourcePage.objects.bulk_create(
+        sorted(pages, key=attrgetter('url')),
+        update_conflicts=True,
+        unique_fields=['url'],
+        update_fields=['etag', 'last_modified', 'content_hash', 'checked_at'],
+    )
@@ -1,70 +1,72 @@
-import time
+import asyncio
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
-from celery import shared_task
-from events.models import Event
-from events.parser import parse_yandex_afisha, parse_event_page
+from celery import shared_task, chord
+from events.models import Event, SourcePage
+from events.scraper import scrape_events, save_source_pages, page_stats, PAGE_OUTCOMES
+from events.ingest import ingest_event_outcomes, count_outcomes, merge_outcomes
+from api.sync import delete_with_tombstones
 
 
-@shared_task
-def update_events_task():
-    urls = [
-        ('https://afisha.yandex.ru/kazan/selections/theatre-tatar-play', 'theatre'),
-        ('https://afisha.yandex.ru/kazan/selections/concert-tatar-music', 'concert')
-    ]
-    deleted_count = Event.objects.filter(
-        Q(date__isnull=False) & 
-        Q(date__lt=timezone.now())
-    ).delete()[0]
-    print(f"Удалено {deleted_count} прошедших мероприятий")
+def page_url(url, page):
+    if page == 1:
+        return url
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query['page'] = page
+    return urlunsplit(parts._replace(query=urlencode(query)))
 
-    total_created = 0
-    total_updated = 0
 
-    for url, event_type in urls:
-        print(f"Обработка {url}...")
+def iter_shards(sources):
+    """
+    Один шард на страницу подборки. Источник - ``(url, event_type)`` или
+    ``(url, event_type, pages)``; число страниц по умолчанию берется из
+    ``EVENTS_PAGES_PER_SOURCE``.
+    """
+    default_pages = getattr(settings, 'EVENTS_PAGES_PER_SOURCE', 1)
+    for url, event_type, *rest in sources:
+        pages = rest[0] if rest else default_pages
+        for page in range(1, pages + 1):
+            yield page_url(url, page), event_type
 
-        try:
-            events_data = parse_yandex_afisha(url, event_type)
 
-            for event_data in events_data:
-                if not event_data['date'] or event_data['date'] < timezone.now():
-                    continue
+@shared_task
+def update_events_task(sources=None):
+    sources = sources or settings.EVENTS_SOURCES
+    shards = [refresh_events_shard.s(url, event_type) for url, event_type in iter_shards(sources)]
+    print(f"Запущено обновление мероприятий: {len(shards)} страниц подборок")
+    return chord(shards)(finish_events_refresh.s()).id
 
-                if event_data.get('source_url'):
-                    details = parse_event_page(
-                        event_data['source_url'],
-                        {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
-                    )
-                    event_data.update(details)
 
-                obj, created = Event.objects.update_or_create(
-                    external_id=event_data['external_id'],
-                    defaults={
-                        'title': event_data['title'],
-                        'description': event_data.get('description', ''),
-                        'date': event_data['date'],
-                        'venue': event_data['venue'],
-                        'price': event_data.get('price', ''),
-                        'image_url': event_data.get('image_url', ''),
-                        'event_type': event_data['event_type'],
-                        'source_url': event_data['source_url']
-                    }
-                )
+@shared_task
+def refresh_events_shard(url, event_type):
+    result = asyncio.run(scrape_events([(url, event_type)]))
+    outcomes = ingest_event_outcomes(result.events)
+    save_source_pages(result.pages.values())
+    # Подборки пересекаются: итоги считаются по событиям и страницам, а не суммой шардов
+    return {'events': outcomes, 'pages': result.page_outcomes}
 
-                if created:
-                    total_created += 1
-                else:
-                    total_updated += 1
 
-                time.sleep(1)
+@shared_task
+def finish_events_refresh(shard_results):
+    totals = {
+        **count_outcomes(merge_outcomes(shard_result['events'] for shard_result in shard_results)),
+        **page_stats(merge_outcomes((shard_result['pages'] for shard_result in shard_results), PAGE_OUTCOMES)),
+    }
 
-        except Exception as e:
-            print(f"Ошибка при обработке {url}: {e}")
-            continue
+    # Клиенты синхронизации должны узнать об удалении прошедших мероприятий
+    deleted_count = delete_with_tombstones(Event.objects.filter(
+        Q(date__isnull=False) &
+        Q(date__lt=timezone.now())
+    ))
+    print(f"Удалено {deleted_count} прошедших мероприятий")
+    SourcePage.objects.exclude(url__in=Event.objects.values('source_url')).delete()
+    print(f"Загружено страниц событий: {totals['pages_fetched']}, без изменений: "
+          f"{totals['pages_not_modified'] + totals['pages_unchanged']}")
 
     return {
         'deleted_old': deleted_count,
-        'created': total_created,
-        'updated': total_updated
+        **totals
     }
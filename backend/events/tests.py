@@ -1,3 +1,227 @@
-from django.test import TestCase
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+import httpx
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from events.fetcher import AsyncFetcher
+from events.ingest import ingest_events
+from events.parser import parse_yandex_afisha, parse_date, parse_price
+from events.scraper import scrape_events, save_source_pages
+from events.tasks import finish_events_refresh
 
-# Create your tests here.
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures' / 'afisha'
+BASE_URL = 'https://afisha.test/kazan/selections/'
+SOURCES = [
+    (f'{BASE_URL}theatre-tatar-play', 'theatre'),
+    (f'{BASE_URL}concert-tatar-music', 'concert'),
+]
+
+
+class FakeAfisha:
+    """
+    Афиша для ``httpx.MockTransport``: подборки и страницы событий из
+    fixtures/afisha с ETag. ``fail(url, ...)`` задает ответы (коды или
+    исключения), которые URL вернет перед настоящим.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.failures = {}
+
+    def fail(self, url, *failures):
+        self.failures[url] = list(failures)
+
+    def requested(self, url):
+        return sum(str(request.url) == url for request in self.requests)
+
+    def __call__(self, request):
+        self.requests.append(request)
+        url = str(request.url)
+        if self.failures.get(url):
+            failure = self.failures[url].pop(0)
+            if isinstance(failure, type) and issubclass(failure, Exception):
+                raise failure('Сбой соединения', request=request)
+            return httpx.Response(failure)
+
+        name = url.removeprefix(BASE_URL)
+        path = FIXTURES_DIR / (name if name.endswith('.html') else f'{name}.html')
+        if not url.startswith(BASE_URL) or not path.is_file():
+            return httpx.Response(404)
+        content = path.read_bytes()
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, content=content,
+                              headers={'ETag': etag, 'Content-Type': 'text/html; charset=utf-8'})
+
+
+def fake_fetcher(afisha, **options):
+    # Без ограничения частоты и пауз между повторами
+    options = {'rate': 10000, 'burst': 10000, 'retries': 2, 'backoff': 0, **options}
+    return AsyncFetcher(transport=httpx.MockTransport(afisha), **options)
+
+
+def upcoming_ids(sources):
+    now = timezone.now()
+    return {event['external_id']
+            for url, event_type in sources
+            for event in parse_yandex_afisha((FIXTURES_DIR / f'{url.removeprefix(BASE_URL)}.html').read_text(),
+                                             url, event_type)
+            if event['date'] and event['date'] >= now}
+
+
+class ScrapeEventsTests(TestCase):
+    def scrape(self, afisha, **options):
+        return async_to_sync(scrape_events)(SOURCES, fake_fetcher(afisha, **options))
+
+    def test_scrape(self):
+        afisha = FakeAfisha()
+        result = self.scrape(afisha)
+
+        self.assertEqual({event['external_id'] for event in result.events}, upcoming_ids(SOURCES))
+        detail_urls = {event['source_url'] for event in result.events}
+        self.assertEqual(result.stats(), {'pages_fetched': len(detail_urls), 'pages_not_modified': 0,
+                                          'pages_unchanged': 0, 'pages_failed': 0})
+        self.assertTrue(all(event['description'] for event in result.events))
+        self.assertEqual(set(result.pages), detail_urls)
+        # Каждая страница запрашивается один раз
+        self.assertEqual(len(afisha.requests), len(SOURCES) + len(detail_urls))
+
+    def test_stored_pages_requested_conditionally(self):
+        afisha = FakeAfisha()
+        first = self.scrape(afisha)
+        ingest_events(first.events)
+        save_source_pages(list(first.pages.values()))
+
+        second = self.scrape(afisha)
+        self.assertEqual(second.stats()['pages_not_modified'], len(first.pages))
+        self.assertEqual(second.stats()['pages_fetched'], 0)
+        # Описание не менялось: ingest оставит сохраненное
+        self.assertFalse(any('description' in event for event in second.events))
+        self.assertEqual(ingest_events(second.events)['updated'], 0)
+
+    def test_listing_retried(self):
+        afisha = FakeAfisha()
+        url = SOURCES[0][0]
+        afisha.fail(url, 503, httpx.ConnectError)
+        result = self.scrape(afisha)
+
+        self.assertEqual(afisha.requested(url), 3)
+        self.assertEqual({event['external_id'] for event in result.events}, upcoming_ids(SOURCES))
+
+    def test_listing_given_up(self):
+        afisha = FakeAfisha()
+        url = SOURCES[0][0]
+        afisha.fail(url, 503, 503, 503)
+        result = self.scrape(afisha)
+
+        self.assertEqual(afisha.requested(url), 3)
+        self.assertEqual({event['external_id'] for event in result.events}, upcoming_ids(SOURCES[1:]))
+
+    def test_detail_page_failed(self):
+        afisha = FakeAfisha()
+        url = f'{BASE_URL}events/1001.html'
+        afisha.fail(url, 404)
+        result = self.scrape(afisha)
+
+        self.assertEqual(result.stats()['pages_failed'], 1)
+        self.assertEqual(afisha.requested(url), 1)
+        event = next(event for event in result.events if event['source_url'] == url)
+        self.assertNotIn('description', event)
+
+
+class FinishEventsRefreshTests(TestCase):
+    def test_overlapping_shards_counted_once(self):
+        shard_results = [
+            {'events': {'1001': 'created', '1002': 'unchanged'},
+             'pages': {'events/1001.html': 'fetched', 'events/1002.html': 'failed'}},
+            {'events': {'1001': 'unchanged', '1003': 'updated'},
+             'pages': {'events/1001.html': 'not_modified', 'events/1002.html': 'fetched'}},
+        ]
+        self.assertEqual(finish_events_refresh(shard_results), {
+            'deleted_old': 0, 'created': 1, 'updated': 1, 'unchanged': 1,
+            'pages_fetched': 2, 'pages_unchanged': 0, 'pages_not_modified': 0, 'pages_failed': 0,
+        })
+
+
+class AsyncFetcherRetryTests(SimpleTestCase):
+    url = f'{BASE_URL}theatre-tatar-play'
+
+    def request(self, afisha, **options):
+        async def request(fetcher):
+            async with fetcher:
+                return await fetcher.request(self.url)
+        return async_to_sync(request)(fake_fetcher(afisha, **options))
+
+    def test_backoff(self):
+        afisha = FakeAfisha()
+        afisha.fail(self.url, 503, httpx.ReadTimeout, 429)
+        with mock.patch('events.fetcher.random.random', return_value=0), \
+                mock.patch('events.fetcher.asyncio.sleep', new_callable=mock.AsyncMock) as sleep:
+            response = self.request(afisha, retries=3, backoff=0.5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(afisha.requested(self.url), 4)
+        self.assertEqual([call.args[0] for call in sleep.await_args_list], [0.5, 1.0, 2.0])
+
+    def test_gives_up(self):
+        afisha = FakeAfisha()
+        afisha.fail(self.url, 503, 503, 503)
+        self.assertIsNone(self.request(afisha, retries=2))
+        self.assertEqual(afisha.requested(self.url), 3)
+
+    def test_client_error_not_retried(self):
+        afisha = FakeAfisha()
+        afisha.fail(self.url, 404)
+        self.assertEqual(self.request(afisha).status_code, 404)
+        self.assertEqual(afisha.requested(self.url), 1)
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class ParseDateTests(SimpleTestCase):
+    def test_current_year(self):
+        self.assertEqual(parse_date('5 февраля, 19:00', now=local(2026, 1, 20)), local(2026, 2, 5, 19, 0))
+
+    def test_january_parsed_in_december(self):
+        self.assertEqual(parse_date('3 января, 18:30', now=local(2026, 12, 20)), local(2027, 1, 3, 18, 30))
+
+    def test_december_parsed_in_january(self):
+        # Прошедшее событие моложе PAST_EVENT_GRACE остается в прошлом году
+        self.assertEqual(parse_date('30 декабря, 19:00', now=local(2027, 1, 5)), local(2026, 12, 30, 19, 0))
+
+    def test_past_grace_moves_to_next_year(self):
+        self.assertEqual(parse_date('1 марта, 19:00', now=local(2026, 5, 1)), local(2027, 3, 1, 19, 0))
+
+    def test_february_29(self):
+        self.assertIsNone(parse_date('29 февраля, 19:00', now=local(2026, 2, 10)))
+        self.assertEqual(parse_date('29 февраля, 19:00', now=local(2027, 12, 20)), local(2028, 2, 29, 19, 0))
+
+    def test_malformed(self):
+        for value in ('', None, 'завтра', '5 февраля', '32 января, 19:00', '5 февраля, 19'):
+            with self.subTest(value):
+                self.assertIsNone(parse_date(value, now=local(2026, 1, 20)))
+
+
+class ParsePriceTests(SimpleTestCase):
+    def test_prices(self):
+        cases = {
+            'от 500 ₽': (500, None),
+            'от\u00a01\u00a0200 ₽': (1200, None),
+            'до 700 ₽': (None, 700),
+            '800 – 2 500 ₽': (800, 2500),
+            '1\u202f500 ₽': (1500, 1500),
+            'Бесплатно': (0, 0),
+            'Вход свободный': (0, 0),
+            'Цена уточняется': (None, None),
+            '': (None, None),
+            None: (None, None),
+        }
+        for value, expected in cases.items():
+            with self.subTest(value):
+                self.assertEqual(parse_price(value), expected)
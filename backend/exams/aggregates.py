@@ -0,0 +1,69 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+from .models import Exam, Question, Choice
+
+
+def _exam_aggregate(expression):
+    return Coalesce(
+        Subquery(Question.objects
+                 .filter(exam=OuterRef('pk'))
+                 .order_by()
+                 .values('exam')
+                 .annotate(value=expression)
+                 .values('value'),
+                 output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def exam_aggregates():
+    return {
+        'total_points': _exam_aggregate(Sum('point')),
+        'question_count': _exam_aggregate(Count('pk')),
+    }
+
+
+def question_aggregates():
+    return {
+        'correct_choice_count': Coalesce(
+            Subquery(Choice.objects
+                     .filter(question=OuterRef('pk'), is_correct=True)
+                     .order_by()
+                     .values('question')
+                     .annotate(value=Count('pk'))
+                     .values('value'),
+                     output_field=IntegerField()),
+            Value(0),
+        ),
+    }
+
+
+def refresh_exam_aggregates(exam_ids=None):
+    """
+    Пересчитывает сумму баллов и число вопросов указанных экзаменов (всех,
+    если ``exam_ids`` равен None) одним UPDATE. У перечисленных экзаменов
+    записано дерево, поэтому их ``updated_at`` тоже сдвигается.
+    """
+    if exam_ids is None:
+        return Exam.objects.update(**exam_aggregates())
+    return Exam.objects.filter(pk__in=exam_ids).update(updated_at=Now(), **exam_aggregates())
+
+
+def refresh_question_aggregates(question_ids=None):
+    questions = Question.objects.all() if question_ids is None else Question.objects.filter(pk__in=question_ids)
+    return questions.update(**question_aggregates())
+
+
+def stale_exams():
+    expected = {f'expected_{name}': value for name, value in exam_aggregates().items()}
+    return (Exam.objects
+            .annotate(**expected)
+            .exclude(total_points=F('expected_total_points'),
+                     question_count=F('expected_question_count')))
+
+
+def stale_questions():
+    expected = {f'expected_{name}': value for name, value in question_aggregates().items()}
+    return (Question.objects
+            .annotate(**expected)
+            .exclude(correct_choice_count=F('expected_correct_choice_count')))
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_CACHE_KEY = 'exams:version:{exam_id}'
+PAYLOAD_CACHE_KEY = 'exams:payload:{exam_id}:{version}'
+
+
+class LocalLRUCache:
+    """
+    Потокобезопасный LRU в памяти процесса с фиксированным числом записей.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ExamPayloadCache:
+    """
+    Двухуровневый кеш сериализованных экзаменов: LRU в памяти процесса перед
+    общим кешем Django. Ключ записи - id экзамена и версия, которая растет
+    при каждой записи экзамена, его вопросов или вариантов, поэтому
+    устаревшие данные не отдаются и не требуют явной очистки.
+    """
+
+    def __init__(self, cache_alias='default', local_max_entries=256, timeout=60 * 60):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.local = LocalLRUCache(local_max_entries)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def reset_stats(self):
+        with self._lock:
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'local_size': len(self.local),
+            }
+
+    def _count(self, local_hits=0, shared_hits=0, misses=0):
+        with self._lock:
+            self.local_hits += local_hits
+            self.shared_hits += shared_hits
+            self.misses += misses
+
+    def get_versions(self, exam_ids):
+        keys = {VERSION_CACHE_KEY.format(exam_id=exam_id): exam_id for exam_id in exam_ids}
+        found = self.shared.get_many(keys)
+        versions = {keys[key]: version for key, version in found.items()}
+        for key, exam_id in keys.items():
+            if exam_id in versions:
+                continue
+            # Новая метка, чтобы после вытеснения версии не отдать старые данные
+            stamp = time.time_ns()
+            if not self.shared.add(key, stamp, self.timeout):
+                stamp = self.shared.get(key, stamp)
+            versions[exam_id] = stamp
+        return versions
+
+    def bump(self, exam_id):
+        key = VERSION_CACHE_KEY.format(exam_id=exam_id)
+        try:
+            self.shared.incr(key)
+        except ValueError:
+            self.shared.set(key, time.time_ns(), self.timeout)
+
+    def get_many(self, versions):
+        payloads = {}
+        shared_keys = {}
+        for exam_id, version in versions.items():
+            payload = self.local.get((exam_id, version))
+            if payload is not None:
+                payloads[exam_id] = payload
+            else:
+                shared_keys[PAYLOAD_CACHE_KEY.format(exam_id=exam_id, version=version)] = exam_id
+        if shared_keys:
+            for key, payload in self.shared.get_many(shared_keys).items():
+                exam_id = shared_keys[key]
+                self.local.set((exam_id, versions[exam_id]), payload)
+                payloads[exam_id] = payload
+        local_hits = len(versions) - len(shared_keys)
+        shared_hits = len(payloads) - local_hits
+        self._count(local_hits, shared_hits, len(versions) - len(payloads))
+        return payloads
+
+    def set_many(self, payloads, versions):
+        shared_values = {}
+        for exam_id, payload in payloads.items():
+            version = versions[exam_id]
+            self.local.set((exam_id, version), payload)
+            shared_values[PAYLOAD_CACHE_KEY.format(exam_id=exam_id, version=version)] = payload
+        self.shared.set_many(shared_values, self.timeout)
+
+
+_config = getattr(settings, 'EXAM_PAYLOAD_CACHE', {})
+exam_payload_cache = ExamPayloadCache(
+    cache_alias=_config.get('CACHE_ALIAS', 'default'),
+    local_max_entries=_config.get('LOCAL_MAX_ENTRIES', 256),
+    timeout=_config.get('TIMEOUT', 60 * 60),
+)
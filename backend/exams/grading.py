@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from .models import Question
+
+ANSWER_KEY_CACHE_KEY = 'exams:answer_key:v2:{exam_id}'
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+
+class AnswerKey:
+    """
+    Компактный ключ ответов экзамена: номер вопроса -> баллы, множество
+    текстов правильных вариантов и id вариантов по тексту. Строится одним
+    запросом и кешируется для каждого экзамена.
+    """
+
+    __slots__ = ('exam_id', 'points', 'correct', 'choices', 'total_points')
+
+    def __init__(self, exam_id, points, correct, choices, total_points):
+        self.exam_id = exam_id
+        self.points = points
+        self.correct = correct
+        self.choices = choices
+        self.total_points = total_points
+
+    @staticmethod
+    def rows(exam_id):
+        """Единственный запрос ``build``: по строке на каждый вариант экзамена."""
+        return (Question.objects
+                .filter(exam_id=exam_id)
+                .order_by('pk', 'choices__pk')
+                .values_list('pk', 'number', 'point',
+                             'choices__pk', 'choices__text', 'choices__is_correct'))
+
+    @classmethod
+    def build(cls, exam_id):
+        rows = cls.rows(exam_id)
+        total_points = 0
+        question_ids = {}
+        points = {}
+        correct = {}
+        choices = {}
+        seen = set()
+        for question_id, number, point, choice_id, text, is_correct in rows:
+            if question_id not in seen:
+                seen.add(question_id)
+                total_points += point
+                # При повторяющихся номерах проверяется первый вопрос
+                if number not in question_ids:
+                    question_ids[number] = question_id
+                    points[number] = point
+                    correct[number] = {}
+                    choices[number] = {}
+            if question_ids[number] != question_id or text is None:
+                continue
+            # Учитывается первый вариант ответа с таким текстом
+            correct[number].setdefault(text, is_correct)
+            choices[number].setdefault(text, choice_id)
+        correct = {
+            number: frozenset(text for text, is_correct in question_choices.items() if is_correct)
+            for number, question_choices in correct.items()
+        }
+        return cls(exam_id, points, correct, choices, total_points)
+
+    def evaluate(self, answers):
+        """
+        Возвращает ``(score, right_answers, choice_ids)``; ``choice_ids`` -
+        засчитанный вариант каждого отвеченного вопроса: правильный, если
+        какой-то ответ на вопрос был верным, иначе первый распознанный.
+        """
+        score = 0
+        right_answers = 0
+        graded = set()
+        chosen = {}
+        for answer in answers:
+            question_number = answer.get('question_number')
+            text = answer.get('text')
+            if not question_number or not text:
+                continue
+            try:
+                question_number = int(question_number)
+            except (TypeError, ValueError):
+                continue
+            if question_number in graded:
+                continue
+            choice_id = self.choices.get(question_number, {}).get(text)
+            if choice_id is None:
+                continue
+            if text in self.correct[question_number]:
+                graded.add(question_number)
+                chosen[question_number] = choice_id
+                score += self.points[question_number]
+                right_answers += 1
+            else:
+                chosen.setdefault(question_number, choice_id)
+        return score, right_answers, list(chosen.values())
+
+    def grade(self, answers):
+        score, right_answers, _ = self.evaluate(answers)
+        return score, right_answers
+
+
+def get_answer_key(exam_id):
+    key = ANSWER_KEY_CACHE_KEY.format(exam_id=exam_id)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = AnswerKey.build(exam_id)
+        cache.set(key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+
+def invalidate_answer_key(exam_id):
+    cache.delete(ANSWER_KEY_CACHE_KEY.format(exam_id=exam_id))
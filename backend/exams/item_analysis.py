@@ -0,0 +1,120 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Attempt, Choice, ExamStats, Question, QuestionStats
+
+ATTEMPTS_CHUNK_SIZE = 5000
+
+
+def load_responses(exam_id):
+    """
+    id выбранных вариантов всех записанных попыток экзамена плоским массивом
+    и строку попытки для каждого id. Строки читаются частями, без моделей.
+    """
+    rows = (Attempt.objects
+            .filter(exam_id=exam_id, choice_ids__isnull=False)
+            .values_list('choice_ids', flat=True)
+            .iterator(chunk_size=ATTEMPTS_CHUNK_SIZE))
+    lengths = []
+    flat = []
+    for choice_ids in rows:
+        lengths.append(len(choice_ids))
+        flat.extend(choice_ids)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    attempt_rows = np.repeat(np.arange(len(lengths)), lengths)
+    return np.asarray(flat, dtype=np.int64), attempt_rows, len(lengths)
+
+
+def analyze_exam(exam_id):
+    """
+    Анализ вопросов одного экзамена по попыткам, записавшим выбранные варианты.
+
+    Ответы на удаленные после попытки варианты не учитываются; вопрос без
+    выбранного варианта считается отвеченным неверно.
+    """
+    questions = list(Question.objects.filter(exam_id=exam_id).order_by('pk').values_list('pk', 'point'))
+    choices = list(Choice.objects
+                   .filter(question__exam_id=exam_id)
+                   .order_by('pk')
+                   .values_list('pk', 'question_id', 'is_correct'))
+    question_ids = [question_id for question_id, _ in questions]
+    points = np.asarray([point for _, point in questions], dtype=np.float64)
+    choice_ids = np.asarray([choice[0] for choice in choices], dtype=np.int64)
+    choice_column = np.searchsorted(question_ids, [choice[1] for choice in choices])
+    choice_correct = np.asarray([choice[2] for choice in choices], dtype=bool)
+
+    flat, attempt_rows, attempt_count = load_responses(exam_id)
+    position = np.searchsorted(choice_ids, flat)
+    known = position < len(choice_ids)
+    known[known] = choice_ids[position[known]] == flat[known]
+    position, attempt_rows = position[known], attempt_rows[known]
+    column = choice_column[position]
+
+    answered = np.zeros((attempt_count, len(question_ids)), dtype=bool)
+    correct = np.zeros((attempt_count, len(question_ids)), dtype=bool)
+    answered[attempt_rows, column] = True
+    correct[attempt_rows, column] = choice_correct[position]
+    choice_counts = np.bincount(position, minlength=len(choice_ids))
+
+    if attempt_count:
+        difficulty = correct.mean(axis=0)
+        # Корреляция вопроса с баллом за остальные вопросы (point-biserial)
+        item_scores = correct * points
+        rest = item_scores.sum(axis=1, keepdims=True) - item_scores
+        item_centered = correct - difficulty
+        rest_centered = rest - rest.mean(axis=0)
+        covariance = (item_centered * rest_centered).sum(axis=0)
+        spread = np.sqrt((item_centered ** 2).sum(axis=0) * (rest_centered ** 2).sum(axis=0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discrimination = np.where(spread > 0, covariance / spread, np.nan)
+    else:
+        difficulty = discrimination = np.full(len(question_ids), np.nan)
+
+    counts_by_question = {question_id: {} for question_id in question_ids}
+    for (choice_id, question_id, _), count in zip(choices, choice_counts.tolist()):
+        counts_by_question[question_id][str(choice_id)] = count
+
+    def value(number):
+        return None if np.isnan(number) else float(number)
+
+    return [
+        QuestionStats(
+            question_id=question_id,
+            attempt_count=attempt_count,
+            answered_count=int(answered[:, index].sum()),
+            difficulty=value(difficulty[index]),
+            discrimination=value(discrimination[index]),
+            choice_counts=counts_by_question[question_id],
+        )
+        for index, question_id in enumerate(question_ids)
+    ]
+
+
+def save_item_stats(exam_id, stats, analyzed_at):
+    with transaction.atomic():
+        QuestionStats.objects.filter(question__exam_id=exam_id).exclude(
+            question_id__in=[item.question_id for item in stats]).delete()
+        QuestionStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['question'],
+            update_fields=['attempt_count', 'answered_count', 'difficulty',
+                           'discrimination', 'choice_counts', 'computed_at'],
+        )
+        ExamStats.objects.filter(exam_id=exam_id).update(items_analyzed_at=analyzed_at)
+
+
+def exams_to_analyze():
+    """Экзамены с попытками, записанными после последнего анализа вопросов."""
+    return (ExamStats.objects
+            .filter(Q(items_analyzed_at__isnull=True) | Q(updated_at__gt=F('items_analyzed_at')))
+            .values_list('exam_id', flat=True))
+
+
+def analyze_items(exam_ids=None):
+    exam_ids = list(exams_to_analyze() if exam_ids is None else exam_ids)
+    for exam_id in exam_ids:
+        analyzed_at = timezone.now()
+        save_item_stats(exam_id, analyze_exam(exam_id), analyzed_at)
+    return len(exam_ids)
@@ -0,0 +1,26 @@
+import sys
+from django.core.management.base import BaseCommand
+from exams.models import Exam
+from exams.transfer import FORMATS, export_exams
+
+
+class Command(BaseCommand):
+    help = 'Выгружает экзамены в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Файл для выгрузки (по умолчанию stdout)')
+        parser.add_argument('--organization', type=int, help='Только экзамены этой организации')
+        parser.add_argument('--type', choices=FORMATS, default='ndjson')
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.all()
+        if options['organization']:
+            exams = exams.filter(author_id=options['organization'])
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in export_exams(exams, options['type']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from organizations.models import Organization
+from exams.transfer import FORMATS, IMPORT_BATCH_SIZE, import_exams
+
+
+class Command(BaseCommand):
+    help = 'Импортирует экзамены организации из файла NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--organization', type=int, required=True, help='ID организации-автора')
+        parser.add_argument('--type', choices=FORMATS,
+                            help='Формат файла (по умолчанию по расширению)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(pk=options['organization'])
+        except Organization.DoesNotExist:
+            raise CommandError(f'Организация {options["organization"]} не найдена')
+        path = options['path']
+        file_format = options['type'] or ('csv' if path.endswith('.csv') else 'ndjson')
+
+        with open(path, encoding='utf-8-sig', newline='') as lines:
+            report = import_exams(lines, organization.pk, file_format, options['batch_size'])
+
+        for error in report.errors:
+            self.stderr.write(f'Строка {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано экзаменов: {report.created}, с ошибками: {report.failed}'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from exams.aggregates import (refresh_exam_aggregates, refresh_question_aggregates,
+                              stale_exams, stale_questions)
+from exams.stats import rebuild_exam_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохраненные агрегаты экзаменов и вопросов или проверяет их (--check)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить агрегаты, ничего не изменяя')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            exams = list(stale_exams().values_list('pk', flat=True))
+            questions = list(stale_questions().values_list('pk', flat=True))
+            if exams or questions:
+                raise CommandError(
+                    f'Устаревшие агрегаты: экзамены {exams[:20]} ({len(exams)}), '
+                    f'вопросы {questions[:20]} ({len(questions)})'
+                )
+            self.stdout.write(self.style.SUCCESS('Агрегаты экзаменов актуальны'))
+            return
+
+        questions = refresh_question_aggregates()
+        exams = refresh_exam_aggregates()
+        stats = rebuild_exam_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны агрегаты: {exams} экзаменов, {questions} вопросов, '
+            f'статистика попыток {stats} экзаменов'
+        ))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def renumber_duplicate_questions(apps, schema_editor):
+    # Вопросы с повторяющимся номером переносятся в конец экзамена,
+    # первый по id сохраняет свой номер, как при проверке ответов
+    Question = apps.get_model('exams', 'Question')
+    duplicates = (Question.objects
+                  .values('exam_id', 'number')
+                  .annotate(count=models.Count('id'))
+                  .filter(count__gt=1))
+    for duplicate in duplicates:
+        questions = list(Question.objects
+                         .filter(exam_id=duplicate['exam_id'], number=duplicate['number'])
+                         .order_by('id'))
+        last_number = (Question.objects
+                       .filter(exam_id=duplicate['exam_id'])
+                       .aggregate(models.Max('number'))['number__max'])
+        for offset, question in enumerate(questions[1:], start=1):
+            question.number = last_number + offset
+            question.save(update_fields=['number'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_remove_exam_points_remove_exam_questions_and_more'),
+        ('organizations', '0005_course_enrollment_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='choice',
+            index=models.Index(fields=['question', 'text'], name='choice_question_text_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='choice',
+            index=models.Index(condition=models.Q(('is_correct', True)), fields=['question'], name='choice_correct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['author', 'level'], name='exam_author_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['level', 'id'], name='exam_level_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['user', 'exam'], name='result_user_exam_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='result_user_completed_idx'),
+        ),
+        migrations.RunPython(renumber_duplicate_questions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(fields=('exam', 'number'), name='question_exam_number_uniq'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:14
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_aggregates(apps, schema_editor):
+    Exam = apps.get_model('exams', 'Exam')
+    Question = apps.get_model('exams', 'Question')
+    Choice = apps.get_model('exams', 'Choice')
+
+    def subquery(queryset, group_by, expression):
+        return Coalesce(
+            Subquery(queryset.order_by().values(group_by).annotate(value=expression).values('value'),
+                     output_field=IntegerField()),
+            Value(0),
+        )
+
+    Question.objects.update(correct_choice_count=subquery(
+        Choice.objects.filter(question=OuterRef('pk'), is_correct=True), 'question', Count('pk')))
+    questions = Question.objects.filter(exam=OuterRef('pk'))
+    Exam.objects.update(
+        total_points=subquery(questions, 'exam', Sum('point')),
+        question_count=subquery(questions, 'exam', Count('pk')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0003_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество вопросов'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='total_points',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Обновляется при изменении вопросов', verbose_name='Сумма баллов'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='correct_choice_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Правильных вариантов'),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:20
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_exam_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('idempotency_key', models.CharField(max_length=64, verbose_name='Ключ идемпотентности')),
+                ('answers', models.JSONField(default=list, verbose_name='Ответы')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('done', 'Проверено'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('score', models.IntegerField(blank=True, null=True, verbose_name='Баллы')),
+                ('percent', models.FloatField(blank=True, null=True, verbose_name='Процент')),
+                ('passed', models.BooleanField(blank=True, null=True, verbose_name='Сдан')),
+                ('right_answers', models.JSONField(blank=True, null=True, verbose_name='Правильные ответы')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='exams.exam')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'idempotency_key'), name='submission_user_key_uniq')],
+            },
+        ),
+    ]
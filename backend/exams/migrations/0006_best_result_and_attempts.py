@@ -0,0 +1,74 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Каждая прежняя строка Result — зачтенная попытка
+COPY_RESULTS_TO_ATTEMPTS = """
+    INSERT INTO exams_attempt (user_id, exam_id, score, percent, passed, created_at)
+    SELECT result.user_id, result.exam_id, result.score,
+           COALESCE(result.score * 100.0 / NULLIF(exam.total_points, 0), 0), TRUE,
+           result.completed_at
+    FROM exams_result result
+    JOIN exams_exam exam ON exam.id = result.exam_id
+"""
+
+# Для пары (user, exam) остается лучший результат, при равенстве — первый
+KEEP_BEST_RESULTS = """
+    DELETE FROM exams_result result
+    USING exams_result other
+    WHERE other.user_id = result.user_id
+      AND other.exam_id = result.exam_id
+      AND (other.score > result.score OR (other.score = result.score AND other.id < result.id))
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_submission'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField(default=0, verbose_name='Баллы')),
+                ('percent', models.FloatField(default=0, verbose_name='Процент')),
+                ('passed', models.BooleanField(default=False, verbose_name='Сдан')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='exam',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exams.exam'),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunSQL(COPY_RESULTS_TO_ATTEMPTS, migrations.RunSQL.noop),
+        migrations.RunSQL(KEEP_BEST_RESULTS, migrations.RunSQL.noop),
+        migrations.RemoveIndex(
+            model_name='result',
+            name='result_user_exam_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='result',
+            constraint=models.UniqueConstraint(fields=('user', 'exam'), name='result_user_exam_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['user', 'exam', '-created_at'], name='attempt_user_exam_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['exam', '-created_at'], name='attempt_exam_created_idx'),
+        ),
+    ]
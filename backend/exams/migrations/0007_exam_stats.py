@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:23
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_EXAM_STATS = """
+    INSERT INTO exams_examstats (exam_id, attempt_count, passed_count, score_sum, histogram, updated_at)
+    SELECT exam_id, COUNT(*), COUNT(*) FILTER (WHERE passed), COALESCE(SUM(score), 0),
+           ARRAY(SELECT COUNT(bucket_attempt.id)
+                 FROM generate_series(0, 9) AS bucket
+                 LEFT JOIN exams_attempt bucket_attempt
+                   ON bucket_attempt.exam_id = attempt.exam_id
+                  AND LEAST(FLOOR(bucket_attempt.percent * 10 / 100), 9) = bucket
+                 GROUP BY bucket ORDER BY bucket),
+           now()
+    FROM exams_attempt attempt
+    GROUP BY exam_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0006_best_result_and_attempts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStats',
+            fields=[
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='exams.exam')),
+                ('attempt_count', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('passed_count', models.PositiveIntegerField(default=0, verbose_name='Сдано')),
+                ('score_sum', models.BigIntegerField(default=0, verbose_name='Сумма баллов')),
+                ('histogram', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=list, size=10, verbose_name='Распределение по процентам')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['exam', '-score', 'completed_at', 'id'], name='result_exam_leaderboard_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_EXAM_STATS, migrations.RunSQL.noop),
+    ]
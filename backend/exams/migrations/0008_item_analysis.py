@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:25
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_exam_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='exams.question')),
+                ('attempt_count', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('answered_count', models.PositiveIntegerField(default=0, verbose_name='Ответов')),
+                ('difficulty', models.FloatField(blank=True, null=True, verbose_name='Доля правильных')),
+                ('discrimination', models.FloatField(blank=True, null=True, verbose_name='Различающая способность')),
+                ('choice_counts', models.JSONField(default=dict, verbose_name='Выбор вариантов')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='choice_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None, verbose_name='Выбранные варианты'),
+        ),
+        migrations.AddField(
+            model_name='examstats',
+            name='items_analyzed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Анализ вопросов'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_item_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(
+            'UPDATE exams_exam SET updated_at = created_at',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_exam_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submission',
+            name='right_answers',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Правильные ответы'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+import uuid
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 from organizations.models import Organization
@@ -14,10 +16,29 @@ LEVEL_CHOICES = [
     ]
 
 
-class Exam(models.Model):
+class AggregateFieldsMixin:
+    """
+    Не дает обычному save записывать материализованные агрегаты: их пишет
+    только ``exams.aggregates``, и устаревший объект не должен их затереть.
+    """
+
+    aggregate_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.aggregate_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Exam(AggregateFieldsMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Меняется и при записи вопросов и вариантов (refresh_exam_aggregates)
+    updated_at = models.DateTimeField(auto_now=True)
     level = models.IntegerField('Уровень',
                              choices=LEVEL_CHOICES,
                              validators=[
@@ -26,23 +47,34 @@ class Exam(models.Model):
                              ],
                              null=False, blank=False, default='1')
     author = models.ForeignKey(Organization, related_name='exams', on_delete=models.CASCADE, verbose_name='Автор теста')
-    @property
-    def total_points(self):
-        return sum(question.point for question in self.questions.all())
-    
+    total_points = models.PositiveIntegerField('Сумма баллов', default=0, editable=False,
+                                               help_text='Обновляется при изменении вопросов')
+    question_count = models.PositiveIntegerField('Количество вопросов', default=0, editable=False)
+    aggregate_fields = ('total_points', 'question_count')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'level'], name='exam_author_level_idx'),
+            models.Index(fields=['level', 'id'], name='exam_level_id_idx'),
+        ]
 
 
 
-class Question(models.Model):
+class Question(AggregateFieldsMixin, models.Model):
     exam = models.ForeignKey(Exam, related_name='questions', on_delete=models.CASCADE)
     text = models.CharField(max_length=255)
     number = models.IntegerField('Номер вопроса', default=1, help_text='Порядковый номер вопроса в тесте')
     point = models.IntegerField('Баллы за вопрос', default=1, help_text='Количество баллов за правильный ответ на вопрос',
                                 validators=[MinValueValidator(1), MaxValueValidator(10)])
+    correct_choice_count = models.PositiveIntegerField('Правильных вариантов', default=0, editable=False)
+    aggregate_fields = ('correct_choice_count',)
 
     class Meta:
         verbose_name = 'Вопрос'
         verbose_name_plural = 'Вопросы'
+        constraints = [
+            models.UniqueConstraint(fields=['exam', 'number'], name='question_exam_number_uniq'),
+        ]
 
     def __str__(self):
         return self.text
@@ -55,14 +87,125 @@ class Choice(models.Model):
     class Meta:
         verbose_name = 'Вариант ответа'
         verbose_name_plural = 'Варианты ответов'
+        indexes = [
+            models.Index(fields=['question', 'text'], name='choice_question_text_idx'),
+            models.Index(fields=['question'], condition=models.Q(is_correct=True),
+                         name='choice_correct_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
 class Result(models.Model):
+    """
+    Лучший зачтенный результат пользователя по экзамену, одна строка на пару.
+    Пишется только ``exams.results.record_attempt``; все попытки хранятся в ``Attempt``.
+    """
+
     user = models.ForeignKey(User, related_name='results', on_delete=models.CASCADE)
     exam = models.ForeignKey(Exam, related_name='results', on_delete=models.CASCADE)
     score = models.IntegerField('Баллы', default=0, help_text='Количество баллов, набранных в тесте', validators=
                                 [MinValueValidator(0), 
                                  MaxValueValidator(100)])
-    completed_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-completed_at', '-id'], name='result_user_completed_idx'),
+            models.Index(fields=['exam', '-score', 'completed_at', 'id'], name='result_exam_leaderboard_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'exam'], name='result_user_exam_uniq'),
+        ]
+
+
+class Attempt(models.Model):
+    """
+    История проверенных попыток, строки только добавляются.
+    """
+
+    user = models.ForeignKey(User, related_name='attempts', on_delete=models.CASCADE)
+    exam = models.ForeignKey(Exam, related_name='attempts', on_delete=models.CASCADE)
+    score = models.IntegerField('Баллы', default=0)
+    percent = models.FloatField('Процент', default=0)
+    passed = models.BooleanField('Сдан', default=False)
+    # Выбранные варианты по отвеченным вопросам; у попыток до их записи — NULL
+    choice_ids = ArrayField(models.BigIntegerField(), null=True, blank=True,
+                            verbose_name='Выбранные варианты')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'exam', '-created_at'], name='attempt_user_exam_idx'),
+            models.Index(fields=['exam', '-created_at'], name='attempt_exam_created_idx'),
+        ]
+
+class Submission(models.Model):
+    """
+    Ответы, принятые на фоновую проверку. ``idempotency_key`` уникален для
+    пользователя, поэтому повторный запрос возвращает ту же попытку.
+    """
+
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'В очереди'),
+        (DONE, 'Проверено'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, related_name='submissions', on_delete=models.CASCADE)
+    exam = models.ForeignKey(Exam, related_name='submissions', on_delete=models.CASCADE)
+    idempotency_key = models.CharField('Ключ идемпотентности', max_length=64)
+    answers = models.JSONField('Ответы', default=list)
+    status = models.CharField('Статус', max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    score = models.IntegerField('Баллы', null=True, blank=True)
+    percent = models.FloatField('Процент', null=True, blank=True)
+    passed = models.BooleanField('Сдан', null=True, blank=True)
+    right_answers = models.PositiveIntegerField('Правильные ответы', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='submission_user_key_uniq'),
+        ]
+
+
+STATS_HISTOGRAM_BUCKETS = 10
+
+
+class ExamStats(models.Model):
+    """
+    Накопленные итоги попыток экзамена, которые ``exams.stats`` обновляет
+    вместе с каждой записанной попыткой. ``histogram`` считает попытки по
+    проценту в интервалах по ``100 / STATS_HISTOGRAM_BUCKETS``.
+    """
+
+    exam = models.OneToOneField(Exam, primary_key=True, related_name='stats', on_delete=models.CASCADE)
+    attempt_count = models.PositiveIntegerField('Попыток', default=0)
+    passed_count = models.PositiveIntegerField('Сдано', default=0)
+    score_sum = models.BigIntegerField('Сумма баллов', default=0)
+    histogram = ArrayField(models.PositiveIntegerField(), size=STATS_HISTOGRAM_BUCKETS,
+                           default=list, verbose_name='Распределение по процентам')
+    updated_at = models.DateTimeField(auto_now=True)
+    items_analyzed_at = models.DateTimeField('Анализ вопросов', null=True, blank=True)
+
+
+class QuestionStats(models.Model):
+    """
+    Анализ вопроса по записанным попыткам, считается пакетно в
+    ``exams.item_analysis``: ``difficulty`` - доля правильных ответов,
+    ``discrimination`` - корреляция вопроса с остальным баллом,
+    ``choice_counts`` - сколько раз выбран каждый вариант по id.
+    """
+
+    question = models.OneToOneField(Question, primary_key=True, related_name='stats', on_delete=models.CASCADE)
+    attempt_count = models.PositiveIntegerField('Попыток', default=0)
+    answered_count = models.PositiveIntegerField('Ответов', default=0)
+    difficulty = models.FloatField('Доля правильных', null=True, blank=True)
+    discrimination = models.FloatField('Различающая способность', null=True, blank=True)
+    choice_counts = models.JSONField('Выбор вариантов', default=dict)
+    computed_at = models.DateTimeField(auto_now=True)
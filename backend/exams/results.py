@@ -0,0 +1,40 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Attempt, Result
+from .stats import record_attempt_stats
+
+UPSERT_BEST_RESULT_SQL = """
+    INSERT INTO {table} (user_id, exam_id, score, completed_at)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (user_id, exam_id) DO UPDATE SET
+        score = GREATEST({table}.score, EXCLUDED.score),
+        completed_at = CASE WHEN EXCLUDED.score > {table}.score
+                            THEN EXCLUDED.completed_at
+                            ELSE {table}.completed_at END
+"""
+
+
+def upsert_best_result(user_id, exam_id, score, completed_at=None):
+    """
+    Поднимает сохраненный лучший балл ``user_id`` по ``exam_id`` одним
+    запросом: параллельные попытки не теряют обновление и не добавляют строку.
+    """
+    table = connection.ops.quote_name(Result._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_BEST_RESULT_SQL.format(table=table),
+                       [user_id, exam_id, score, completed_at or timezone.now()])
+
+
+@transaction.atomic
+def record_attempt(user_id, exam_id, outcome):
+    """
+    Добавляет проверенную попытку в историю и, если она зачтена, в лучший
+    результат. ``outcome`` - результат ``evaluate_answers``.
+    """
+    attempt = Attempt.objects.create(user_id=user_id, exam_id=exam_id, score=outcome['score'],
+                                     percent=outcome['percent'], passed=outcome['passed'],
+                                     choice_ids=outcome.get('choice_ids'))
+    record_attempt_stats(attempt)
+    if attempt.passed:
+        upsert_best_result(user_id, exam_id, attempt.score, attempt.created_at)
+    return attempt
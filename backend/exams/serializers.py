@@ -1,5 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Exam, Result, Choice, Question
+from .models import Exam, Result, Choice, Question, Submission
+from users.principal import get_principal
+from .writers import create_exam_tree, sync_exam_tree
 
 
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -48,17 +51,10 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
     def validate_choices(self, value):
         if len(value) < 2:
             raise serializers.ValidationError("Должно быть минимум 2 варианта ответа.")
-        if not any(choice['is_correct'] for choice in value):
+        if not any(choice.get('is_correct', False) for choice in value):
             raise serializers.ValidationError("Хотя бы один вариант должен быть помечен как правильный.")
         return value
 
-    def create(self, validated_data):
-        choices_data = validated_data.pop('choices')
-        question = Question.objects.create(**validated_data)
-        for choice_data in choices_data:
-            Choice.objects.create(question=question, **choice_data)
-        return question
-
 
 class QuestionSerializer(serializers.ModelSerializer):
     choices = ChoiceSerializer(many=True)
@@ -67,6 +63,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'text', 'point', 'number', 'choices']
         read_only_fields = ['id', 'number']
+        prefetch_related = ['choices']
         
 
 
@@ -76,6 +73,7 @@ class ExamSerializer(serializers.ModelSerializer):
     class Meta:
         model = Exam
         fields = ['id', 'title', 'description', 'level', 'questions', 'author']
+        prefetch_related = ['questions']
 
 
 class ExamCreateSerializer(serializers.ModelSerializer):
@@ -86,20 +84,48 @@ class ExamCreateSerializer(serializers.ModelSerializer):
         fields = ['title', 'description', 'level', 'questions']
         read_only_fields = ['author']
 
+    def to_internal_value(self, data):
+        if not self.partial or 'questions' not in data:
+            return super().to_internal_value(data)
+        # PATCH заменяет вопросы целиком: проверяем их как при создании,
+        # иначе partial пропустит обязательные поля вложенных вопросов
+        data = data.copy()
+        questions = QuestionCreateSerializer(data=data.pop('questions'), many=True)
+        if not questions.is_valid():
+            raise serializers.ValidationError({'questions': questions.errors})
+        try:
+            questions_data = self.validate_questions(questions.validated_data)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'questions': exc.detail})
+        return {**super().to_internal_value(data), 'questions': questions_data}
+
+    def validate_questions(self, value):
+        numbers = [question.get('number', 1) for question in value]
+        if len(numbers) != len(set(numbers)):
+            raise serializers.ValidationError("Номера вопросов в экзамене не должны повторяться.")
+        return value
+
     def create(self, validated_data):
-        request = self.context.get('request')
-        if request.user.role != 'organization':
+        principal = get_principal(self.context.get('request'))
+        if not principal.is_organization:
             raise serializers.ValidationError("У вас нет прав для создания экзамена.")
         
         questions_data = validated_data.pop('questions')
-        exam = Exam.objects.create(author=request.user.organizations.first(), **validated_data)
-        for question_data in questions_data:
-            choices_data = question_data.pop('choices')
-            question = Question.objects.create(exam=exam, **question_data)
-            for choice_data in choices_data:
-                Choice.objects.create(question=question, **choice_data)
-        exam.save()
-        return exam
+        exam = create_exam_tree(principal.organization_id, questions_data, **validated_data)
+        return self.reload(exam)
+
+    def update(self, instance, validated_data):
+        # При PATCH без вопросов меняются только поля самого экзамена
+        questions_data = validated_data.pop('questions', None)
+        with transaction.atomic():
+            exam = super().update(instance, validated_data)
+            if questions_data is not None:
+                sync_exam_tree(exam, questions_data)
+        return self.reload(exam)
+
+    def reload(self, exam):
+        # Ответ сериализует всё дерево: подгружаем его тремя запросами
+        return Exam.objects.prefetch_related('questions__choices').get(pk=exam.pk)
 
 
 class ResultSerializer(serializers.ModelSerializer):
@@ -114,6 +140,44 @@ class ResultSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField(source='user.id')
+    first_name = serializers.CharField(source='user.first_name')
+    last_name = serializers.CharField(source='user.last_name')
+
+    class Meta:
+        model = Result
+        fields = ['user_id', 'first_name', 'last_name', 'score', 'completed_at']
+
+
+class ChoiceStatsSerializer(serializers.ModelSerializer):
+    picked = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Choice
+        fields = ['id', 'text', 'is_correct', 'picked']
+
+    def get_picked(self, choice):
+        stats = getattr(choice.question, 'stats', None)
+        return stats.choice_counts.get(str(choice.pk), 0) if stats else 0
+
+
+class QuestionStatsSerializer(serializers.ModelSerializer):
+    attempts = serializers.IntegerField(source='stats.attempt_count', default=0)
+    answered = serializers.IntegerField(source='stats.answered_count', default=0)
+    difficulty = serializers.FloatField(source='stats.difficulty', default=None)
+    discrimination = serializers.FloatField(source='stats.discrimination', default=None)
+    computed_at = serializers.DateTimeField(source='stats.computed_at', default=None)
+    choices = ChoiceStatsSerializer(many=True)
+
+    class Meta:
+        model = Question
+        fields = ['id', 'number', 'text', 'attempts', 'answered', 'difficulty',
+                  'discrimination', 'computed_at', 'choices']
+        select_related = ['stats']
+        prefetch_related = ['choices']
+
+
 class SubmitAnswerSerializer(serializers.Serializer):
     question_number = serializers.IntegerField(help_text='Номер вопроса')
     text = serializers.CharField(help_text='Текст ответа')
@@ -121,3 +185,13 @@ class SubmitAnswerSerializer(serializers.Serializer):
 class SubmitExamSerializer(serializers.Serializer):
     exam_id = serializers.IntegerField(help_text='ID экзамена')
     answers = SubmitAnswerSerializer(many=True, help_text='Список ответов на вопросы экзамена')
+    idempotency_key = serializers.CharField(required=False, max_length=64,
+                                            help_text='Ключ для асинхронной проверки (или заголовок Idempotency-Key)')
+
+
+class SubmissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Submission
+        fields = ['id', 'exam', 'status', 'score', 'percent', 'passed', 'right_answers',
+                  'created_at', 'completed_at']
+        read_only_fields = fields
@@ -0,0 +1,75 @@
+import threading
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Exam, Question, Choice
+from .grading import invalidate_answer_key
+from .cache import exam_payload_cache
+from .aggregates import refresh_exam_aggregates, refresh_question_aggregates
+
+
+_state = threading.local()
+
+
+@contextmanager
+def bulk_exam_write():
+    """
+    Отключает построчные обработчики, пока пакетная запись пишет дерево
+    экзамена; агрегаты и кеши она обновляет один раз в конце.
+    """
+    previous = getattr(_state, 'bulk', False)
+    _state.bulk = True
+    try:
+        yield
+    finally:
+        _state.bulk = previous
+
+
+def _in_bulk_write():
+    return getattr(_state, 'bulk', False)
+
+
+def exam_tree_changed(exam_id):
+    invalidate_answer_key(exam_id)
+    exam_payload_cache.bump(exam_id)
+
+
+def exam_tree_changed_on_commit(exam_id):
+    # До коммита другой запрос прочитал бы старое дерево и закешировал его под новой версией
+    transaction.on_commit(lambda: exam_tree_changed(exam_id))
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def exam_changed(sender, instance, **kwargs):
+    if _in_bulk_write():
+        return
+    exam_id = instance.pk
+    transaction.on_commit(lambda: exam_payload_cache.bump(exam_id))
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    if _in_bulk_write():
+        return
+    refresh_exam_aggregates([instance.exam_id])
+    exam_tree_changed_on_commit(instance.exam_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    if _in_bulk_write():
+        return
+    refresh_question_aggregates([instance.question_id])
+    if Choice.question.is_cached(instance):
+        exam_id = instance.question.exam_id
+    else:
+        exam_id = (Question.objects
+                   .filter(pk=instance.question_id)
+                   .values_list('exam_id', flat=True)
+                   .first())
+    if exam_id is not None:
+        # Вариант меняет экзамен, но агрегаты экзамена тут не пересчитываются
+        Exam.objects.filter(pk=exam_id).update(updated_at=Now())
+        exam_tree_changed_on_commit(exam_id)
@@ -0,0 +1,111 @@
+from django.db import connection
+from django.utils import timezone
+from .models import Attempt, ExamStats, Result, STATS_HISTOGRAM_BUCKETS
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+RECORD_ATTEMPT_SQL = """
+    INSERT INTO {table} (exam_id, attempt_count, passed_count, score_sum, histogram, updated_at)
+    VALUES (%(exam_id)s, 1, %(passed)s, %(score)s, %(histogram)s, %(now)s)
+    ON CONFLICT (exam_id) DO UPDATE SET
+        attempt_count = {table}.attempt_count + 1,
+        passed_count = {table}.passed_count + EXCLUDED.passed_count,
+        score_sum = {table}.score_sum + EXCLUDED.score_sum,
+        histogram[%(bucket)s] = {table}.histogram[%(bucket)s] + 1,
+        updated_at = EXCLUDED.updated_at
+"""
+
+REBUILD_SQL = """
+    INSERT INTO {table} (exam_id, attempt_count, passed_count, score_sum, histogram, updated_at)
+    SELECT exam_id, COUNT(*), COUNT(*) FILTER (WHERE passed), COALESCE(SUM(score), 0),
+           ARRAY(SELECT COUNT(bucket_attempt.id)
+                 FROM generate_series(0, %(last_bucket)s) AS bucket
+                 LEFT JOIN {attempts} bucket_attempt
+                   ON bucket_attempt.exam_id = attempt.exam_id
+                  AND LEAST(FLOOR(bucket_attempt.percent * %(buckets)s / 100), %(last_bucket)s) = bucket
+                 GROUP BY bucket ORDER BY bucket),
+           %(now)s
+    FROM {attempts} attempt
+    {where}
+    GROUP BY exam_id
+    ON CONFLICT (exam_id) DO UPDATE SET
+        attempt_count = EXCLUDED.attempt_count,
+        passed_count = EXCLUDED.passed_count,
+        score_sum = EXCLUDED.score_sum,
+        histogram = EXCLUDED.histogram,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def histogram_bucket(percent):
+    """Номер интервала гистограммы (с нуля) для процента попытки."""
+    return min(max(int(percent * STATS_HISTOGRAM_BUCKETS // 100), 0), STATS_HISTOGRAM_BUCKETS - 1)
+
+
+def record_attempt_stats(attempt):
+    """
+    Добавляет попытку к итогам ее экзамена одним upsert. Вызывается в
+    транзакции, которая записывает попытку.
+    """
+    bucket = histogram_bucket(attempt.percent)
+    histogram = [0] * STATS_HISTOGRAM_BUCKETS
+    histogram[bucket] = 1
+    with connection.cursor() as cursor:
+        cursor.execute(RECORD_ATTEMPT_SQL.format(table=ExamStats._meta.db_table), {
+            'exam_id': attempt.exam_id,
+            'passed': int(attempt.passed),
+            'score': attempt.score,
+            'histogram': histogram,
+            # Массивы в PostgreSQL нумеруются с единицы
+            'bucket': bucket + 1,
+            'now': timezone.now(),
+        })
+
+
+def rebuild_exam_stats(exam_ids=None):
+    """Пересчитывает итоги ``exam_ids`` (по умолчанию всех экзаменов) по ``Attempt``."""
+    params = {'buckets': STATS_HISTOGRAM_BUCKETS, 'last_bucket': STATS_HISTOGRAM_BUCKETS - 1,
+              'now': timezone.now()}
+    where = ''
+    if exam_ids is not None:
+        where = 'WHERE attempt.exam_id = ANY(%(exam_ids)s)'
+        params['exam_ids'] = list(exam_ids)
+    sql = REBUILD_SQL.format(table=ExamStats._meta.db_table,
+                             attempts=Attempt._meta.db_table, where=where)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def exam_summary(exam):
+    """
+    Статистика экзамена: чтение ``ExamStats`` по первичному ключу, не
+    зависящее от числа попыток.
+    """
+    stats = ExamStats.objects.filter(exam=exam).first()
+    attempts = stats.attempt_count if stats else 0
+    passed = stats.passed_count if stats else 0
+    histogram = (stats.histogram if stats else None) or [0] * STATS_HISTOGRAM_BUCKETS
+    width = 100 // STATS_HISTOGRAM_BUCKETS
+    return {
+        'exam': exam.pk,
+        'attempts': attempts,
+        'passed': passed,
+        'pass_rate': passed / attempts * 100 if attempts else 0,
+        'average_score': stats.score_sum / attempts if attempts else 0,
+        'histogram': [
+            {'from': index * width, 'to': 100 if index == len(histogram) - 1 else (index + 1) * width,
+             'count': count}
+            for index, count in enumerate(histogram)
+        ],
+    }
+
+
+def leaderboard(exam, size=LEADERBOARD_SIZE):
+    """Лучшие ``size`` результатов экзамена из индекса рейтинга."""
+    return (Result.objects
+            .filter(exam=exam)
+            .select_related('user')
+            .only('score', 'completed_at', 'user__id', 'user__first_name', 'user__last_name')
+            .order_by('-score', 'completed_at', 'id')[:min(size, LEADERBOARD_MAX_SIZE)])
@@ -0,0 +1,84 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .grading import get_answer_key
+from .models import Submission
+from .serializers import SubmitAnswerSerializer
+from .results import record_attempt
+
+PERCENT_TO_PASS_EXAM = 60
+
+
+def evaluate_answers(exam_id, answers):
+    """
+    Проверяет ``answers`` по кешированному ключу ответов. Возвращает ответ
+    ``submit_exam``, а также ``passed`` и выбранные ``choice_ids``.
+    """
+    answer_key = get_answer_key(exam_id)
+    score, right_answers, choice_ids = answer_key.evaluate(answers)
+    if answer_key.total_points:
+        result_percent = score / answer_key.total_points * 100
+    else:
+        result_percent = 0
+    passed = result_percent >= PERCENT_TO_PASS_EXAM
+    return {
+        'result': 'passed' if passed else 'failed',
+        'score': score,
+        'percent': result_percent,
+        'right_answers': right_answers,
+        'passed': passed,
+        'choice_ids': choice_ids,
+    }
+
+
+def accept_submission(user, exam_id, idempotency_key, answers):
+    """
+    Сохраняет проверенные ``SubmitAnswerSerializer`` ответы для фоновой
+    проверки. Возвращает ``(submission, created)``; повторный ключ того же
+    пользователя возвращает существующую попытку и ничего не ставит в
+    очередь. ``(None, False)`` - экзамен удален до сохранения попытки.
+    """
+    try:
+        with transaction.atomic():
+            submission = Submission.objects.create(user=user, exam_id=exam_id,
+                                                   idempotency_key=idempotency_key,
+                                                   answers=answers)
+    except IntegrityError:
+        # Повторный ключ или экзамен, удаленный после проверки во view
+        submission = Submission.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        return submission, False
+
+    from .tasks import grade_submission_task
+    transaction.on_commit(lambda: grade_submission_task.delay(str(submission.pk)))
+    return submission, True
+
+
+def complete_submission(submission_id):
+    """
+    Проверяет ожидающую попытку и записывает результат. Повторный вызов
+    безопасен: завершенные попытки не меняются.
+    """
+    with transaction.atomic():
+        submission = (Submission.objects
+                      .select_for_update()
+                      .filter(pk=submission_id, status=Submission.PENDING)
+                      .first())
+        if submission is None:
+            return None
+        answers = SubmitAnswerSerializer(data=submission.answers, many=True)
+        # Ошибка в сохраненных ответах не исправится повтором задачи
+        answers.is_valid(raise_exception=True)
+        outcome = evaluate_answers(submission.exam_id, answers.validated_data)
+        record_attempt(submission.user_id, submission.exam_id, outcome)
+        submission.status = Submission.DONE
+        submission.score = outcome['score']
+        submission.percent = outcome['percent']
+        submission.passed = outcome['passed']
+        submission.right_answers = outcome['right_answers']
+        submission.completed_at = timezone.now()
+        submission.save()
+    return submission
+
+
+def fail_submission(submission_id):
+    Submission.objects.filter(pk=submission_id, status=Submission.PENDING).update(
+        status=Submission.FAILED, completed_at=timezone.now())
@@ -0,0 +1,31 @@
+from celery import shared_task
+from rest_framework.exceptions import ValidationError
+from exams.submissions import complete_submission, fail_submission
+from exams.item_analysis import analyze_items
+
+
+@shared_task(bind=True, max_retries=5)
+def grade_submission_task(self, submission_id):
+    try:
+        submission = complete_submission(submission_id)
+    except ValidationError as e:
+        # Некорректные ответы не станут корректными при повторе
+        print(f"Некорректные ответы в попытке {submission_id}: {e.detail}")
+        fail_submission(submission_id)
+        return None
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            print(f"Не удалось проверить попытку {submission_id}: {e}")
+            fail_submission(submission_id)
+            raise
+        raise self.retry(exc=e, countdown=2 ** self.request.retries)
+    if submission is None:
+        return None
+    return {'submission_id': submission_id, 'score': submission.score, 'passed': submission.passed}
+
+
+@shared_task
+def analyze_items_task():
+    analyzed = analyze_items()
+    print(f"Анализ вопросов обновлен для {analyzed} экзаменов")
+    return analyzed
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import json
+from django.db.models import Prefetch
+from .models import Question, Choice
+from .serializers import ExamCreateSerializer
+from .writers import create_exam_trees
+
+FORMATS = ('ndjson', 'csv')
+CSV_FIELDS = ['exam', 'title', 'description', 'level',
+              'question_number', 'question_text', 'point', 'choice_text', 'is_correct']
+IMPORT_BATCH_SIZE = 200
+EXPORT_CHUNK_SIZE = 200
+MAX_REPORTED_ERRORS = 100
+
+
+def decode_lines(lines):
+    """Строки загруженного файла или тела запроса как текст, без BOM."""
+    return codecs.iterdecode(lines, 'utf-8-sig')
+
+
+def read_ndjson(lines):
+    """
+    По экзамену на строку в формате ``POST /api/v1/exam/``.
+    Выдает ``(line_number, exam_data)``; для неразборчивых строк - ``None``.
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def read_csv(lines):
+    """
+    По варианту ответа на строку (см. ``CSV_FIELDS``). Подряд идущие строки с
+    одним ``exam`` образуют экзамен, с одним ``question_number`` - вопрос;
+    колонки экзамена и вопроса берутся из их первой строки.
+    """
+    reader = csv.DictReader(lines)
+    exam_key = exam_data = exam_line = None
+    for row in reader:
+        if exam_data is None or row.get('exam') != exam_key:
+            if exam_data is not None:
+                yield exam_line, exam_data
+            exam_key, exam_line = row.get('exam'), reader.line_num
+            exam_data = {
+                'title': row.get('title'),
+                'description': row.get('description') or '',
+                'level': row.get('level'),
+                'questions': [],
+            }
+        questions = exam_data['questions']
+        if not questions or questions[-1]['number'] != row.get('question_number'):
+            questions.append({
+                'number': row.get('question_number'),
+                'text': row.get('question_text'),
+                'point': row.get('point') or 1,
+                'choices': [],
+            })
+        questions[-1]['choices'].append({
+            'text': row.get('choice_text'),
+            'is_correct': row.get('is_correct') or False,
+        })
+    if exam_data is not None:
+        yield exam_line, exam_data
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+
+def import_exams(lines, author_id, file_format='ndjson', batch_size=IMPORT_BATCH_SIZE):
+    """
+    Проверяет экзамены из текстовых ``lines`` по одному через
+    ``ExamCreateSerializer`` и создает корректные пачками по ``batch_size``.
+    В памяти только текущая пачка; некорректные экзамены пропускаются и
+    попадают в отчет.
+    """
+    report = ImportReport()
+    batch = []
+    for line_number, exam_data in READERS[file_format](lines):
+        if not isinstance(exam_data, dict):
+            report.add_error(line_number, {'non_field_errors': ['Некорректная запись экзамена.']})
+            continue
+        serializer = ExamCreateSerializer(data=exam_data)
+        if not serializer.is_valid():
+            report.add_error(line_number, serializer.errors)
+            continue
+        batch.append(serializer.validated_data)
+        if len(batch) >= batch_size:
+            report.created += len(create_exam_trees(author_id, batch))
+            batch = []
+    if batch:
+        report.created += len(create_exam_trees(author_id, batch))
+    return report
+
+
+def export_queryset(queryset):
+    return queryset.order_by('pk').prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('number')),
+        Prefetch('questions__choices', queryset=Choice.objects.order_by('pk')),
+    )
+
+
+def iter_exam_trees(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    # iterator() подгружает вопросы и варианты для каждой пачки отдельно
+    return export_queryset(queryset).iterator(chunk_size=chunk_size)
+
+
+def exam_record(exam):
+    return {
+        'title': exam.title,
+        'description': exam.description,
+        'level': exam.level,
+        'questions': [{
+            'number': question.number,
+            'text': question.text,
+            'point': question.point,
+            'choices': [{'text': choice.text, 'is_correct': choice.is_correct}
+                        for choice in question.choices.all()],
+        } for question in exam.questions.all()],
+    }
+
+
+def export_ndjson(queryset):
+    for exam in iter_exam_trees(queryset):
+        yield json.dumps(exam_record(exam), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for exam in iter_exam_trees(queryset):
+        for question in exam.questions.all():
+            for choice in question.choices.all():
+                yield writer.writerow([
+                    exam.pk, exam.title, exam.description, exam.level,
+                    question.number, question.text, question.point,
+                    choice.text, int(choice.is_correct),
+                ])
+
+
+EXPORTERS = {'ndjson': export_ndjson, 'csv': export_csv}
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_exams(queryset, file_format='ndjson'):
+    return EXPORTERS[file_format](queryset)
@@ -0,0 +1,135 @@
+from django.db import transaction
+from .models import Exam, Question, Choice
+from .aggregates import refresh_exam_aggregates, refresh_question_aggregates
+from .signals import bulk_exam_write, exam_tree_changed_on_commit
+
+QUESTION_DEFAULTS = {'number': 1, 'point': 1}
+
+
+def _question_values(question_data):
+    return {**QUESTION_DEFAULTS, **{key: value for key, value in question_data.items() if key != 'choices'}}
+
+
+def _finish_exam_write(exam, question_ids):
+    if question_ids:
+        refresh_question_aggregates(question_ids)
+    refresh_exam_aggregates([exam.pk])
+    exam_tree_changed_on_commit(exam.pk)
+
+
+@transaction.atomic
+def create_exam_trees(author_id, exams_data):
+    """
+    Создает экзамены с вопросами и вариантами одним пакетным INSERT на
+    таблицу. Агрегаты считаются по входным данным, так что ничего не
+    записывается дважды.
+    """
+    exams = []
+    questions = []
+    choices = []
+    for exam_data in exams_data:
+        questions_data = exam_data['questions']
+        exam = Exam(author_id=author_id,
+                    **{key: value for key, value in exam_data.items() if key != 'questions'})
+        exams.append(exam)
+        for question_data in questions_data:
+            question = Question(exam=exam, **_question_values(question_data))
+            question_choices = [Choice(question=question, **choice_data)
+                                for choice_data in question_data['choices']]
+            question.correct_choice_count = sum(choice.is_correct for choice in question_choices)
+            exam.total_points += question.point
+            exam.question_count += 1
+            questions.append(question)
+            choices.extend(question_choices)
+
+    Exam.objects.bulk_create(exams)
+    Question.objects.bulk_create(questions)
+    Choice.objects.bulk_create(choices)
+    return exams
+
+
+def create_exam_tree(author_id, questions_data, **exam_data):
+    return create_exam_trees(author_id, [{**exam_data, 'questions': questions_data}])[0]
+
+
+@transaction.atomic
+def sync_exam_tree(exam, questions_data):
+    """
+    Приводит сохраненные вопросы экзамена в соответствие с ``questions_data``.
+
+    Вопросы сопоставляются по номеру, варианты - по тексту; пишутся только
+    отличающиеся строки, отсутствующие во входных данных удаляются.
+    """
+    existing = {question.number: question
+                for question in exam.questions.prefetch_related('choices')}
+    new_questions = []
+    new_choices = []
+    changed_questions = []
+    changed_choices = []
+    deleted_choices = []
+    touched = set()
+
+    for question_data in questions_data:
+        values = _question_values(question_data)
+        question = existing.pop(values['number'], None)
+        if question is None:
+            question = Question(exam=exam, **values)
+            new_questions.append(question)
+            new_choices.extend(Choice(question=question, **choice_data)
+                               for choice_data in question_data['choices'])
+            continue
+
+        if question.text != values['text'] or question.point != values['point']:
+            question.text = values['text']
+            question.point = values['point']
+            changed_questions.append(question)
+
+        stored = {}
+        for choice in question.choices.all():
+            if choice.text in stored:
+                deleted_choices.append(choice.pk)
+            else:
+                stored[choice.text] = choice
+        for choice_data in question_data['choices']:
+            choice = stored.pop(choice_data['text'], None)
+            is_correct = choice_data.get('is_correct', False)
+            if choice is None:
+                new_choices.append(Choice(question=question, **choice_data))
+                touched.add(question.pk)
+            elif choice.is_correct != is_correct:
+                choice.is_correct = is_correct
+                changed_choices.append(choice)
+                touched.add(question.pk)
+        if stored:
+            deleted_choices.extend(choice.pk for choice in stored.values())
+            touched.add(question.pk)
+
+    with bulk_exam_write():
+        if existing:
+            Question.objects.filter(pk__in=[question.pk for question in existing.values()]).delete()
+        if deleted_choices:
+            Choice.objects.filter(pk__in=deleted_choices).delete()
+        if changed_questions:
+            Question.objects.bulk_update(changed_questions, ['text', 'point'])
+        if changed_choices:
+            Choice.objects.bulk_update(changed_choices, ['is_correct'])
+        Question.objects.bulk_create(new_questions)
+        Choice.objects.bulk_create(new_choices)
+
+    touched.update(question.pk for question in new_questions)
+    _finish_exam_write(exam, list(touched))
+    return exam
+
+
+@transaction.atomic
+def delete_exam_trees(exams):
+    """
+    Удаляет экзамены с вопросами, вариантами и результатами. Построчные
+    обработчики на время каскада отключены; кеши сбрасываются один раз на экзамен.
+    """
+    exam_ids = list(exams.values_list('pk', flat=True))
+    with bulk_exam_write():
+        deleted = Exam.objects.filter(pk__in=exam_ids).delete()[0]
+    for exam_id in exam_ids:
+        exam_tree_changed_on_commit(exam_id)
+    return deleted
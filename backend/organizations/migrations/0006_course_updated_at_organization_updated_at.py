@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0005_course_enrollment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunSQL(
+            ['UPDATE organizations_course SET updated_at = created_at',
+             'UPDATE organizations_organization SET updated_at = created_at'],
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0006_course_updated_at_organization_updated_at'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name', 'description', config='russian'), '||', django.contrib.postgres.search.SearchVector('name', 'description', config='simple'), django.contrib.postgres.search.SearchConfig('russian')), name='course_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='course_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
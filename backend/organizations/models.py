@@ -1,9 +1,15 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
 
+# Как events.models.SEARCH_VECTOR: поиск использует это же выражение индекса
+SEARCH_VECTOR = (SearchVector('name', 'description', config='russian')
+                 + SearchVector('name', 'description', config='simple'))
+
 
 class Organization(models.Model):
     owner = models.ForeignKey(User, models.CASCADE,
@@ -15,6 +21,7 @@ class Organization(models.Model):
     addres = models.JSONField('Адрес', null=False, blank=True, default=dict)
     description = models.TextField('Описание', null=True, blank=True)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     def __str__(self):
         return self.name
@@ -34,6 +41,7 @@ class Course(models.Model):
     name = models.CharField('Название', max_length=256, null=False)
     description = models.TextField('Описание', null=True, blank=True)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     photo = models.ImageField('Фото',
                               upload_to='courses/',
                               null=True,
@@ -48,6 +56,14 @@ class Course(models.Model):
                              ],
                              null=False, blank=False, default='1')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['organization', 'level', 'id'], name='course_org_level_idx'),
+            models.Index(fields=['level', 'id'], name='course_level_id_idx'),
+            GinIndex(SEARCH_VECTOR, name='course_search_idx'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='course_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -67,6 +83,9 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('user', 'course')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='enrollment_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} -> {self.course.name}"
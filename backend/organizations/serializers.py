@@ -1,11 +1,12 @@
 from .models import Organization, Course, Enrollment
 from rest_framework import serializers
+from users.principal import get_principal
 
 
 class OrganizationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Organization
-        fields = '__all__'
+        fields = ['id', 'name', 'addres', 'description', 'created_at', 'owner']
         read_only_fields = ('owner', 'created_at')
 
     def create(self, validated_data):
@@ -24,17 +25,17 @@ class CourseSerializer(serializers.ModelSerializer):
     organization_name = serializers.CharField(source='organization.name', read_only=True)
     class Meta:
         model = Course
-        fields = '__all__'
+        fields = ['id', 'organization_name', 'name', 'description', 'created_at', 'photo',
+                  'start_date', 'end_date', 'level', 'organization']
         read_only_fields = ('organization', 'created_at')
+        select_related = ('organization',)
 
     def create(self, validated_data):
-        request = self.context.get('request')
-        validated_data['organization'] = request.user.organizations.first()
+        validated_data['organization_id'] = get_principal(self.context.get('request')).organization_id
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
-        request = self.context.get('request')
-        if request.user.role != 'organization':
+        if not get_principal(self.context.get('request')).is_organization:
             raise serializers.ValidationError("You do not have permission to update this course.")
         return super().update(instance, validated_data)
 
@@ -46,6 +47,7 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         model = Enrollment
         fields = ['id', 'course', 'course_name', 'created_at']
         read_only_fields = ['created_at']
+        select_related = ['course']
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
@@ -3,6 +3,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 from celery.schedules import crontab
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -24,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'users.apps.UsersConfig',
     'events.apps.EventsConfig',
     'organizations.apps.OrganizationsConfig',
@@ -80,6 +82,33 @@ DATABASES = {
 
 
 
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    # Ключи ответов, версии экзаменов и отозванные токены должны быть общими
+    # для всех процессов и воркера Celery, локальный кеш здесь не подходит
+    raise ImproperlyConfigured('Для работы без DEBUG нужен общий кеш: задайте REDIS_URL')
+
+EXAM_PAYLOAD_CACHE = {
+    'LOCAL_MAX_ENTRIES': int(os.getenv('EXAM_CACHE_LOCAL_MAX_ENTRIES', 256)),
+    'TIMEOUT': 60 * 60,
+}
+
+# Под ASGI читающие эндпоинты обслуживаются асинхронными представлениями (api/async_views.py)
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', '0') == '1'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -128,7 +157,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.PrincipalJWTAuthentication',
     ],
 }
 
@@ -136,6 +165,9 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
    'ACCESS_TOKEN_LIFETIME': timedelta(weeks=1),
    'AUTH_HEADER_TYPES': ('Bearer',),
+   # Роль и организация в токене: аутентификация обходится без запроса к БД
+   'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.PrincipalTokenObtainPairSerializer',
+   'TOKEN_REFRESH_SERIALIZER': 'users.tokens.PrincipalTokenRefreshSerializer',
 }
 AUTH_USER_MODEL = 'users.User'
 CORS_ALLOW_ALL_ORIGINS = True
@@ -166,12 +198,42 @@ SWAGGER_SETTINGS = {
    }
 }
 
+EVENTS_SOURCES = [
+    ('https://afisha.yandex.ru/kazan/selections/theatre-tatar-play', 'theatre'),
+    ('https://afisha.yandex.ru/kazan/selections/concert-tatar-music', 'concert'),
+]
+EVENTS_PAGES_PER_SOURCE = 1
+EVENTS_PARSER_BACKEND = 'lxml'  # lxml, strainer или soup
+EVENTS_SCRAPER = {
+    'RATE': 2.0,  # запросов в секунду на один хост
+    'BURST': 2,
+    'CONCURRENCY': 4,
+    'TIMEOUT': 10.0,
+    'RETRIES': 3,
+    'BACKOFF': 0.5,
+}
+
+# Дельта-синхронизация каталогов (/api/v1/sync/)
+SYNC_API = {
+    'OVERLAP': 300,  # секунд, повторно отдаваемых следующему запросу
+    'TOMBSTONE_DAYS': 30,  # после этого клиент получает полную копию
+}
+
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
-CELERY_RESULT_BACKEND = 'rpc://'
+# Обновление мероприятий собирается через chord, нужен общий бэкенд результатов
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', os.getenv('REDIS_URL') or 'rpc://')
 CELERY_TIMEZONE = 'Europe/Moscow'
 CELERY_BEAT_SCHEDULE = {
     'update-events': {
         'task': 'events.tasks.update_events_task',
         'schedule': crontab(hour=2, minute=0),
     },
+    'analyze-exam-items': {
+        'task': 'exams.tasks.analyze_items_task',
+        'schedule': crontab(minute=30),
+    },
+    'purge-tombstones': {
+        'task': 'api.tasks.purge_tombstones_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
 }
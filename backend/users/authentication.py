@@ -0,0 +1,71 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .denylist import is_revoked, ais_revoked
+from .principal import Principal
+from .tokens import ROLE_CLAIM, ORGANIZATION_CLAIM
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без запроса пользователя на каждый запрос.
+
+    По токену с claims роли и организации строится ``User`` из claims;
+    остальные поля загружаются при первом обращении. Отозванные токены
+    отклоняются по списку в кеше. Для токенов, выданных до появления claims,
+    пользователь загружается из базы.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            self.set_principal(request, *result)
+        return result
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` для асинхронных view: список отозванных читается через
+        асинхронный API кеша, к базе обращаются только токены без claims.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = super().get_validated_token(raw_token)
+        if await ais_revoked(token):
+            raise self.revoked()
+        if ROLE_CLAIM in token:
+            user = self.get_user(token)
+        else:
+            user = await sync_to_async(self.get_user)(token)
+        self.set_principal(request, user, token)
+        return user, token
+
+    def set_principal(self, request, user, token):
+        if ROLE_CLAIM in token:
+            principal = Principal.from_claims(user.pk, token[ROLE_CLAIM], token.get(ORGANIZATION_CLAIM))
+        else:
+            principal = Principal.for_user(user)
+        request._request.principal = principal
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise self.revoked()
+        return token
+
+    def revoked(self):
+        return InvalidToken({'detail': 'Токен отозван', 'code': 'token_revoked'})
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        return get_user_model().from_claims(user_id, validated_token[ROLE_CLAIM])
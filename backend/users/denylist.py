@@ -0,0 +1,54 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+TOKEN_KEY = 'jwt:denylist:{jti}'
+USER_KEY = 'jwt:revoked_before:{user_id}'
+
+
+def _user_id(token):
+    return token.payload.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id'))
+
+
+def revoke_token(token):
+    """Отзывает один access- или refresh-токен до истечения его срока."""
+    ttl = int(token.payload['exp'] - time.time())
+    if ttl > 0:
+        cache.set(TOKEN_KEY.format(jti=token.payload['jti']), True, ttl)
+
+
+def revoke_user_tokens(user_id):
+    """
+    Отзывает все токены пользователя, выданные раньше текущей секунды.
+    Сохранение или удаление ``User`` вызывает ее из ``users.signals``; код,
+    меняющий пользователей через ``QuerySet.update()``, обходит сигналы и
+    должен вызвать ее для каждого затронутого пользователя сам.
+    """
+    lifetime = settings.SIMPLE_JWT.get('REFRESH_TOKEN_LIFETIME')
+    timeout = int(lifetime.total_seconds()) if lifetime else 60 * 60 * 24 * 30
+    # iat в токене - целые секунды: метка той же точности не отзывает
+    # токен, выданный сразу после отзыва в ту же секунду
+    cache.set(USER_KEY.format(user_id=user_id), int(time.time()), timeout)
+
+
+def _keys(token):
+    return (TOKEN_KEY.format(jti=token.payload.get('jti')),
+            USER_KEY.format(user_id=_user_id(token)))
+
+
+def is_revoked(token):
+    """Одно обращение к кешу: запись самого токена и метка отзыва его пользователя."""
+    token_key, user_key = _keys(token)
+    return _revoked(token, token_key, user_key, cache.get_many([token_key, user_key]))
+
+
+async def ais_revoked(token):
+    token_key, user_key = _keys(token)
+    return _revoked(token, token_key, user_key, await cache.aget_many([token_key, user_key]))
+
+
+def _revoked(token, token_key, user_key, found):
+    if found.get(token_key):
+        return True
+    revoked_before = found.get(user_key)
+    return revoked_before is not None and token.payload.get('iat', 0) < revoked_before
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import BaseUserManager
 
@@ -36,3 +36,21 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"{self.last_name} {self.first_name} {self.patronymic or ''}".strip()
+
+    @classmethod
+    def from_claims(cls, user_id, role):
+        """
+        Пользователь, известный только по claims токена: заданы id и роль,
+        остальные поля отложены и загружаются вместе при первом обращении.
+        """
+        user = cls.from_db(router.db_for_read(cls), ['id', 'role'], [user_id, role])
+        user._from_claims = True
+        return user
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Пользователь из токена подгружает все отложенные поля одним запросом
+        if fields is not None and getattr(self, '_from_claims', False):
+            deferred = self.get_deferred_fields()
+            if deferred and set(fields) <= deferred:
+                fields = list(deferred)
+        super().refresh_from_db(using, fields, from_queryset)
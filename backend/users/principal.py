@@ -0,0 +1,81 @@
+ORGANIZATION_ROLE = 'organization'
+_UNRESOLVED = object()
+
+
+class Principal:
+    """
+    Кто выполняет запрос: id пользователя, роль и id организации. Строится
+    один раз на запрос; id организации стоит одного запроса при первом
+    обращении и ни одного, если уже известен (например, из токена).
+    """
+
+    __slots__ = ('user_id', 'role', '_organization_id')
+
+    def __init__(self, user_id, role, organization_id=_UNRESOLVED):
+        self.user_id = user_id
+        self.role = role
+        self._organization_id = organization_id
+
+    @classmethod
+    def for_user(cls, user):
+        if not getattr(user, 'is_authenticated', False):
+            return cls(None, None, None)
+        return cls(user.pk, user.role)
+
+    @classmethod
+    def from_claims(cls, user_id, role, organization_id):
+        # Организация, созданная после выдачи токена, в нем еще не указана
+        if organization_id is None:
+            return cls(user_id, role)
+        return cls(user_id, role, organization_id)
+
+    @property
+    def is_organization(self):
+        return self.role == ORGANIZATION_ROLE
+
+    @property
+    def organization_id(self):
+        """Организация пользователя-организации, ``None`` для остальных."""
+        if self._organization_id is _UNRESOLVED:
+            self._organization_id = get_organization_id(self.user_id, self.role)
+        return self._organization_id
+
+    async def aget_organization_id(self):
+        if self._organization_id is _UNRESOLVED:
+            self._organization_id = await aget_organization_id(self.user_id, self.role)
+        return self._organization_id
+
+
+def get_organization_id(user_id, role):
+    if role != ORGANIZATION_ROLE:
+        return None
+    from organizations.models import Organization
+    return (Organization.objects
+            .filter(owner_id=user_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+            .first())
+
+
+def get_principal(request):
+    """
+    Principal запроса DRF или Django, кешируется на исходном ``HttpRequest``,
+    чтобы его разделяли view, права доступа и сериализаторы.
+    """
+    http_request = getattr(request, '_request', request)
+    principal = getattr(http_request, 'principal', None)
+    if principal is None or principal.user_id != request.user.pk:
+        principal = Principal.for_user(request.user)
+        http_request.principal = principal
+    return principal
+
+
+async def aget_organization_id(user_id, role):
+    if role != ORGANIZATION_ROLE:
+        return None
+    from organizations.models import Organization
+    return await (Organization.objects
+                  .filter(owner_id=user_id)
+                  .order_by('pk')
+                  .values_list('pk', flat=True)
+                  .afirst())
@@ -0,0 +1,34 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import User
+from .denylist import revoke_user_tokens
+
+# Смена этих полей делает недействительными выданные токены. QuerySet.update()
+# сигналов не отправляет: после него нужно вызвать revoke_user_tokens явно
+TOKEN_FIELDS = ('role', 'is_active', 'password')
+
+
+@receiver(pre_save, sender=User)
+def remember_token_fields(sender, instance, update_fields=None, **kwargs):
+    instance._revoke_tokens = False
+    if instance._state.adding or instance.pk is None:
+        return
+    fields = [field for field in TOKEN_FIELDS
+              if field not in instance.get_deferred_fields()
+              and (update_fields is None or field in update_fields)]
+    if not fields:
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._revoke_tokens = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in fields)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user_tokens(sender, instance, created, **kwargs):
+    if getattr(instance, '_revoke_tokens', False):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
@@ -0,0 +1,28 @@
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .denylist import is_revoked
+from .principal import get_organization_id
+
+ROLE_CLAIM = 'role'
+ORGANIZATION_CLAIM = 'org'
+
+
+class PrincipalTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Добавляет в выдаваемые токены роль и id организации пользователя, чтобы
+    аутентификация строила principal запроса без базы.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[ROLE_CLAIM] = user.role
+        token[ORGANIZATION_CLAIM] = get_organization_id(user.pk, user.role)
+        return token
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        if is_revoked(self.token_class(attrs['refresh'])):
+            raise InvalidToken('Токен отозван')
+        return super().validate(attrs)